@@ -0,0 +1,189 @@
+"""Benchmarks for the course scheduling solver.
+
+Usage: python benchmark.py [problem_directory]
+
+Compares the node throughput of the schedule scanning search (the original implementation, kept here as a reference)
+with the occupancy index search, and the explored nodes of the fixed order search with the minimum remaining values search,
+on the given problem and on larger synthetic terms. Then it compares the memory of the stored solutions as compact tuples and as
+lists of scheduled course objects.
+"""
+import csv
+import random
+import sys
+import time
+import tracemalloc
+
+from ceng461_hw1_280201033 import CourseSchedulingCSP, TIME_SLOTS, course, read_problem, scheduled_course
+
+class NodeBudgetExceeded(Exception):
+    """Raised to stop a search after a fixed number of nodes."""
+
+class ScanningCourseSchedulingCSP(CourseSchedulingCSP):
+    """The original search, every constraint check scans the whole partial schedule."""
+    def backtrack(self, schedule:list[scheduled_course]):
+        self.explored_nodes += 1
+        if(len(schedule) == len(self.courses)):
+            yield list(schedule)
+            return
+
+        to_be_assigned_course = self.courses[len(schedule)]
+        for classroom in self.classrooms:
+            if(not self.capacity_compliance(to_be_assigned_course, classroom)):
+                continue
+            for time_slot in self.time_slots:
+                index = self.time_slots.index(time_slot)
+                to_be_assigned_time_slots = self.time_slots[index:(index+to_be_assigned_course.hours)]
+                if(not self.consecutive_scheduling(to_be_assigned_time_slots)):
+                    continue
+                willBeAssigned = True
+                for assignable_time_slot in to_be_assigned_time_slots:
+                    if(assignable_time_slot not in self.preferences[to_be_assigned_course.instructor]):
+                        willBeAssigned = False
+                        break
+                    for assigned_course in schedule:
+                        if(assigned_course.classroom == classroom and assignable_time_slot in assigned_course.time_slots):
+                            willBeAssigned = False
+                        elif(assigned_course.Course.instructor == to_be_assigned_course.instructor and assignable_time_slot in assigned_course.time_slots):
+                            willBeAssigned = False
+                        else:
+                            for coordination in self.coordinations:
+                                if((to_be_assigned_course.name in coordination) and (assigned_course.Course.name in coordination)):
+                                    if(assignable_time_slot in assigned_course.time_slots):
+                                        willBeAssigned = False
+                        if(not willBeAssigned):
+                            break
+                    if(not willBeAssigned):
+                        break
+
+                if(willBeAssigned):
+                    assigned_course = scheduled_course(to_be_assigned_course, to_be_assigned_time_slots, classroom)
+                    schedule.append(assigned_course)
+                    yield from self.backtrack(schedule)
+                    schedule.pop()
+
+def with_node_budget(solver_class:type, node_budget:int) -> type:
+    """This function will create a subclass of the solver class which stops the search after node_budget nodes."""
+    class BudgetedSolver(solver_class):
+        def backtrack(self, schedule, *args):
+            if(self.explored_nodes >= node_budget):
+                raise NodeBudgetExceeded()
+            yield from super().backtrack(schedule, *args)
+
+        def backtrack_mrv(self, schedule, domains):
+            if(self.explored_nodes >= node_budget):
+                raise NodeBudgetExceeded()
+            yield from super().backtrack_mrv(schedule, domains)
+    return BudgetedSolver
+
+def generate_problem(course_count:int, classroom_count:int, instructor_count:int, coordination_count:int, seed:int = 0):
+    """This function will generate a random problem in the same form as read_problem returns.
+
+    Keyword arguments:
+
+    course_count, classroom_count, instructor_count, coordination_count: Size of the generated term.
+
+    seed: Seed of the random generator, the same seed always generates the same problem.
+    """
+    generator = random.Random(seed)
+    instructors = [f"i{index}" for index in range(instructor_count)]
+    classrooms = {f"D{index}": generator.choice([30, 40, 50, 60, 70, 100]) for index in range(classroom_count)}
+    largest_classroom = max(classrooms.values())
+    courses = [course(f"C{index}", generator.choice(instructors), generator.randint(10, largest_classroom), generator.randint(2, 4)) for index in range(course_count)]
+    preferences = {}
+    for instructor in instructors: #Every instructor prefers two or three whole days.
+        days = generator.sample(range(5), generator.randint(2, 3))
+        preferences[instructor] = [time_slot for day in sorted(days) for time_slot in TIME_SLOTS[day*8:(day+1)*8]]
+    coordinations = [[Course.name for Course in generator.sample(courses, generator.randint(2, 4))] for _ in range(coordination_count)]
+    return courses, classrooms, preferences, coordinations
+
+def write_problem(problem, problem_path:str) -> None:
+    """This function will write a problem, for example a generated one, to a directory in the csv format of problem1, so it can be read with read_problem.
+
+    Keyword arguments:
+
+    problem: The courses, classrooms, preferences and coordinations, in the same form as read_problem returns.
+
+    problem_path: The directory that the csv files are written to, it must exist.
+    """
+    courses, classrooms, preferences, coordinations = problem
+    with open(problem_path + "/courses.csv", "w", newline="") as file:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(["Course", "Instructor", "Students", "Hours"])
+        writer.writerows([Course.name, Course.instructor, Course.students, Course.hours] for Course in courses)
+    with open(problem_path + "/classrooms.csv", "w", newline="") as file:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(["Classroom", "Capacity"])
+        writer.writerows(classrooms.items())
+    with open(problem_path + "/preferences.csv", "w", newline="") as file:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(["Instructor", "Times"])
+        writer.writerows([instructor, " ".join(time_slots)] for instructor, time_slots in preferences.items())
+    with open(problem_path + "/coordinations.csv", "w", newline="") as file:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(["Courses"])
+        writer.writerows([" ".join(coordination)] for coordination in coordinations)
+
+def measure(solver_class:type, problem, node_budget:int, search:str = "fixed") -> tuple[int, int, int | None, float]:
+    """This function will run the solver until the search ends or node_budget nodes are explored and return the node count, the solution count,
+    the node count when the first solution was found and the elapsed time."""
+    courses, classrooms, preferences, coordinations = problem
+    solver = with_node_budget(solver_class, node_budget)(courses, classrooms, preferences, coordinations, list(TIME_SLOTS))
+    solution_count = 0
+    first_solution_node = None
+    start = time.perf_counter()
+    try:
+        for solution_count, _ in enumerate(solver.iter_solutions(search), start=1):
+            if(first_solution_node is None):
+                first_solution_node = solver.explored_nodes
+    except NodeBudgetExceeded:
+        pass
+    return solver.explored_nodes, solution_count, first_solution_node, time.perf_counter() - start
+
+class dict_scheduled_course:
+    """The scheduled course before __slots__, every object has its own attribute dictionary."""
+    def __init__(self, Course:course, time_slots:list[str], classroom:str) -> None:
+        self.Course = Course
+        self.time_slots = time_slots
+        self.classroom = classroom
+
+def stored_size(build) -> int:
+    """This function will return the number of the bytes that are allocated by build() and still alive while its result is kept."""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+def measure_memory(problem, limit:int) -> None:
+    """This function will print the bytes per stored solution for the first limit solutions of the problem in every representation."""
+    courses, classrooms, preferences, coordinations = problem
+    solver = CourseSchedulingCSP(courses, classrooms, preferences, coordinations, list(TIME_SLOTS))
+    print(f"first {limit} solutions of {len(courses)} courses")
+    representations = (
+        ("tuple", lambda: list(solver.iter_solutions(limit=limit))),
+        ("slots objects", lambda: [solver.decode_solution(solution) for solution in solver.iter_solutions(limit=limit)]),
+        ("dict objects", lambda: [[dict_scheduled_course(assigned_course.Course, assigned_course.time_slots, assigned_course.classroom) for assigned_course in solver.decode_solution(solution)] for solution in solver.iter_solutions(limit=limit)]),
+    )
+    print(f"{'representation':<16}{'bytes/solution':>16}")
+    for name, build in representations:
+        print(f"{name:<16}{stored_size(build)/limit:>16.0f}")
+
+def main():
+    problems = [(sys.argv[1] if len(sys.argv) > 1 else "problem1", read_problem(sys.argv[1] if len(sys.argv) > 1 else "problem1"))]
+    for course_count in (20, 50, 100):
+        problems.append((f"synthetic-{course_count}", generate_problem(course_count, course_count // 4, course_count // 3, course_count // 5, seed=course_count)))
+
+    node_budget = 5000
+    print(f"{'problem':<16}{'solver':<16}{'nodes':>10}{'solutions':>11}{'first':>8}{'seconds':>10}{'nodes/s':>12}")
+    for name, problem in problems:
+        for solver_name, solver_class, search in (("scanning", ScanningCourseSchedulingCSP, "fixed"), ("indexed", CourseSchedulingCSP, "fixed"), ("indexed-mrv", CourseSchedulingCSP, "mrv")):
+            nodes, solutions, first_solution_node, elapsed = measure(solver_class, problem, node_budget, search)
+            first_solution_node = "-" if first_solution_node is None else first_solution_node
+            print(f"{name:<16}{solver_name:<16}{nodes:>10}{solutions:>11}{first_solution_node:>8}{elapsed:>10.3f}{nodes/elapsed:>12.0f}")
+
+    print()
+    measure_memory(generate_problem(7, 2, 3, 2, seed=3), 50000)
+
+if __name__ == "__main__":
+    main()
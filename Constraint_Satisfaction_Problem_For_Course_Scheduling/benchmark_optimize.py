@@ -0,0 +1,44 @@
+"""Benchmark for the optimization mode of the course scheduler.
+
+Usage: python benchmark_optimize.py [problem_directory]
+
+For every problem and objective, finds the cheapest schedule once by enumerating all the schedules and once with branch and bound,
+and reports the explored nodes and the time of both. Then runs the anytime search on a large synthetic term under a time limit,
+where enumeration is hopeless, and reports how the incumbent and the lower bound develop.
+"""
+import sys
+import time
+
+from benchmark import generate_problem
+from ceng461_hw1_280201033 import CourseSchedulingCSP, TIME_SLOTS, objective_weights, read_problem
+
+def main():
+    problem_path = sys.argv[1] if len(sys.argv) > 1 else "problem1"
+    problems = [(problem_path, read_problem(problem_path)), ("synthetic-7", generate_problem(7, 2, 3, 2, seed=3)), ("synthetic-6", generate_problem(6, 2, 3, 1, seed=1))]
+    objectives = [("waste", objective_weights(1, 0, 0)), ("gaps+days", objective_weights(0, 5, 1)), ("all", objective_weights(1, 1, 1))]
+
+    print(f"{'problem':<14}{'objective':<11}{'cost':>8}{'enum nodes':>12}{'enum s':>9}{'b&b nodes':>11}{'b&b s':>9}")
+    for problem_name, problem in problems:
+        for objective_name, weights in objectives:
+            enumeration = CourseSchedulingCSP(*problem, list(TIME_SLOTS))
+            start = time.perf_counter()
+            enumeration_cost = min((enumeration.solution_cost(solution, weights) for solution in enumeration.iter_solutions()), default=None)
+            enumeration_time = time.perf_counter() - start
+
+            branch_and_bound = CourseSchedulingCSP(*problem, list(TIME_SLOTS))
+            start = time.perf_counter()
+            best_solutions = branch_and_bound.optimize(weights)
+            branch_and_bound_time = time.perf_counter() - start
+
+            assert (best_solutions[0][0] if best_solutions else None) == enumeration_cost
+            print(f"{problem_name:<14}{objective_name:<11}{enumeration_cost:>8}{enumeration.explored_nodes:>12}{enumeration_time:>9.3f}{branch_and_bound.explored_nodes:>11}{branch_and_bound_time:>9.3f}")
+
+    print()
+    solver = CourseSchedulingCSP(*generate_problem(30, 10, 15, 3, seed=2), list(TIME_SLOTS))
+    start = time.perf_counter()
+    for cost, lower_bound, solution in solver.iter_optimize(objective_weights(), time_limit=5):
+        print(f"{time.perf_counter() - start:8.3f} s  incumbent {cost:8.1f}  lower bound {lower_bound:8.1f}  nodes {solver.explored_nodes}")
+    print(f"{time.perf_counter() - start:8.3f} s  {'optimal' if solver.optimization_complete else 'time limit reached'}, nodes {solver.explored_nodes}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Scaling benchmark for the parallel course scheduling search.
+
+Usage: python benchmark_parallel.py [--workers 1 2 4 8] [--split-depth 2] [--courses 7 --classrooms 2 --instructors 3 --coordinations 2 --seed 3]
+
+Enumerates all the solutions of a synthetic problem with the serial search and with the parallel search for every worker count,
+in the ordered and in the unordered mode, and reports the speedup over the serial search.
+"""
+import argparse
+import multiprocessing
+import time
+
+from benchmark import generate_problem
+from ceng461_hw1_280201033 import CourseSchedulingCSP, TIME_SLOTS
+
+def count_solutions(solutions) -> tuple[int, float]:
+    """This function will consume the solutions and return their count and the elapsed time."""
+    start = time.perf_counter()
+    count = 0
+    for count, _ in enumerate(solutions, start=1):
+        pass
+    return count, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the scaling of the parallel course scheduling search.")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, 8, multiprocessing.cpu_count()}))
+    parser.add_argument("--split-depth", type=int, default=2)
+    parser.add_argument("--courses", type=int, default=7)
+    parser.add_argument("--classrooms", type=int, default=2)
+    parser.add_argument("--instructors", type=int, default=3)
+    parser.add_argument("--coordinations", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    problem = generate_problem(args.courses, args.classrooms, args.instructors, args.coordinations, args.seed)
+    serial_count, serial_time = count_solutions(CourseSchedulingCSP(*problem, list(TIME_SLOTS)).iter_solutions())
+    print(f"{multiprocessing.cpu_count()} cpus, {serial_count} solutions, serial search {serial_time:.2f} s")
+
+    print(f"{'workers':>8}{'mode':>11}{'seconds':>10}{'speedup':>9}")
+    for workers in args.workers:
+        for mode in ("ordered", "unordered"):
+            solver = CourseSchedulingCSP(*problem, list(TIME_SLOTS))
+            count, elapsed = count_solutions(solver.iter_parallel_solutions(workers, args.split_depth, mode == "ordered"))
+            assert count == serial_count, f"{count} solutions are found instead of {serial_count}"
+            print(f"{workers:>8}{mode:>11}{elapsed:>10.2f}{serial_time/elapsed:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,23 @@
+import argparse
+import contextlib
 import csv
+import functools
+import heapq
+import itertools
+import math
+import multiprocessing
+import os
 import sys
+import time
+from collections.abc import Iterable, Iterator
 
-#Created two data classes to increase the readability of the code.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) #run_logging.py is in the parent directory, it is shared by the three projects
+from run_logging import phase_timer, record_sink
+
+#Created two data classes to increase the readability of the code. They have __slots__, so they do not carry a dictionary per object.
 class course:
+    __slots__ = ("name", "instructor", "students", "hours")
+
     def __init__(self, name:str, instructor:str, students:int, hours:int) -> None:
         self.name = name
         self.instructor = instructor
@@ -10,10 +25,33 @@ class course:
         self.hours = hours
 
 class scheduled_course:
-    def __init__(self, Course:course, time_slots:list[str], classroom:str) -> None:
+    __slots__ = ("Course", "time_slots", "classroom", "time_slot_mask")
+
+    def __init__(self, Course:course, time_slots:list[str], classroom:str, time_slot_mask:int = 0) -> None:
         self.Course = Course
         self.time_slots = time_slots
         self.classroom = classroom
+        self.time_slot_mask = time_slot_mask #Same time slots as a bitmask.
+
+class objective_weights:
+    """Weights of the soft constraint costs that the optimization mode minimizes.
+
+    waste: Weight of the wasted capacity, the empty seats of a classroom times the hours of the course.
+
+    gaps: Weight of the idle time slots of an instructor between two courses on the same day.
+
+    days: Weight of the number of the days that an instructor teaches.
+    """
+    __slots__ = ("waste", "gaps", "days")
+
+    def __init__(self, waste:float = 1.0, gaps:float = 1.0, days:float = 1.0) -> None:
+        self.waste = waste
+        self.gaps = gaps
+        self.days = days
+
+#A solution is a tuple with one placement per course in the order of the courses list. A placement is the integer classroom_id * len(time_slots) + start,
+#where classroom_id is the index of the classroom and start is the index of the first time slot of the course. decode_solution converts it to scheduled courses.
+Solution = tuple[int, ...]
 
 class CourseSchedulingCSP:
     """The class that the problem is solved."""
@@ -24,24 +62,155 @@ class CourseSchedulingCSP:
         self.coordinations = coordinations
         self.time_slots = time_slots
         self.solutions = []
+        self.explored_nodes = 0 #Number of backtrack calls, used for measuring the search speed.
+
+        #Integer encoding: the solver only works with the indices of the courses, classrooms and instructors. Names are used only while reading and writing.
+        self.slot_count = len(time_slots)
+        self.classroom_names = list(classrooms)
+        self.instructor_names = list(dict.fromkeys(Course.instructor for Course in courses))
+        instructor_ids = {instructor: index for index, instructor in enumerate(self.instructor_names)}
+        course_ids = {Course.name: index for index, Course in enumerate(courses)}
+        self.course_instructors = [instructor_ids[Course.instructor] for Course in courses]
+        self.course_hours = [Course.hours for Course in courses]
+        self.course_coordinations = [[index for index, coordination in enumerate(coordinations) if Course.name in coordination] for Course in courses]
+        self.coordination_courses = [[course_ids[name] for name in coordination if name in course_ids] for coordination in coordinations]
+
+        #Occupancy index: every time slot is a bit, so a block of time slots is a single integer and an overlap check is a single AND.
+        #The occupancy masks are updated on every assignment and removal, so the constraints never scan the schedule.
+        self.time_slot_bits = {time_slot: 1 << index for index, time_slot in enumerate(time_slots)}
+        self.preference_masks = [self.time_slots_to_mask(preferences[instructor]) for instructor in self.instructor_names]
+        self.classroom_occupancy = [0] * len(self.classroom_names)
+        self.instructor_occupancy = [0] * len(self.instructor_names)
+        self.coordination_occupancy = [0] * len(coordinations)
+
+        #Capacity, consecutiveness and preferences only depend on the course, so every course's domain of (classroom, mask, placement) values is built once.
+        self.static_domains = [self.static_domain(index) for index in range(len(courses))]
+        self.constraint_neighbours = [self.neighbours(index) for index in range(len(courses))]
+
+        #The time slots of every day as a bitmask, the day of a time slot is its name without the last digit.
+        day_masks = {}
+        for time_slot, bit in self.time_slot_bits.items():
+            day_masks[time_slot[:-1]] = day_masks.get(time_slot[:-1], 0) | bit
+        self.day_masks = list(day_masks.values())
+        self.last_courses = {instructor_id: course_index for course_index, instructor_id in enumerate(self.course_instructors)} #After its last course, the time slots of an instructor do not change in the fixed order search.
+
+    def time_slots_to_mask(self, time_slots:list[str]) -> int:
+        """This function will convert a list of time slots to a bitmask. Unknown time slots are ignored.
 
-    
-    def exclusive_classroom(self,schedule:list[scheduled_course], time_slot:str, classroom:str) -> bool:
-        """This function will check if the time slot is available for the classroom.
+        Keyword arguments:
+
+        time_slots: The list of time slots.
+        """
+        mask = 0
+        for time_slot in time_slots:
+            mask |= self.time_slot_bits.get(time_slot, 0)
+        return mask
+
+    def block_mask(self, course_index:int, start:int) -> int:
+        """This function will return the bitmask of the time slots of the course when it starts at the given time slot index.
+        The block is contiguous, so its mask is a run of bits starting at the index. It is shorter if the course does not fit before the last time slot.
 
         Keyword arguments:
 
-        schedule: Contains already assigned courses and their time slots with the classroom.
+        course_index: Index of the course in the courses list.
+
+        start: Index of the first time slot of the course.
+        """
+        return ((1 << min(self.course_hours[course_index], self.slot_count - start)) - 1) << start
 
-        time_slot: The time slot that we try to assign the new course.
+    def static_domain(self, course_index:int) -> list[tuple[int, int, int]]:
+        """This function will return every (classroom id, time slot mask, placement) value of the course that satisfies the constraints which do not depend on other courses.
+        The values are in the order that the fixed order search tries them.
 
-        classroom: The classroom that we try to assign the new course.
+        Keyword arguments:
+
+        course_index: Index of the course in the courses list.
         """
-        for assigned_course in schedule:
-            if (assigned_course.classroom == classroom):
-                if(time_slot in assigned_course.time_slots):
-                    return False
-        return True
+        to_be_assigned_course = self.courses[course_index]
+        domain = []
+        for classroom_id, classroom in enumerate(self.classroom_names):
+            if(not self.capacity_compliance(to_be_assigned_course, classroom)):
+                continue
+            for start in range(self.slot_count):
+                to_be_assigned_time_slots = self.time_slots[start:(start+to_be_assigned_course.hours)] #For a time slot, I created a block of time slots that the course will be in and check if its consecutive.
+                if(not self.consecutive_scheduling(to_be_assigned_time_slots)):
+                    continue
+                time_slot_mask = self.block_mask(course_index, start)
+                if(not self.instructor_preferences_compliance(self.course_instructors[course_index], time_slot_mask)):
+                    continue
+                domain.append((classroom_id, time_slot_mask, classroom_id * self.slot_count + start))
+        return domain
+
+    def neighbours(self, course_index:int) -> set[int]:
+        """This function will return the indices of the courses that can not overlap with the course in any classroom, because they have the same instructor or they are coordinated.
+
+        Keyword arguments:
+
+        course_index: Index of the course in the courses list.
+        """
+        coordinated_courses = set()
+        for index in self.course_coordinations[course_index]:
+            coordinated_courses.update(self.coordination_courses[index])
+        instructor = self.course_instructors[course_index]
+        return {index for index in range(len(self.courses)) if index != course_index and (self.course_instructors[index] == instructor or index in coordinated_courses)}
+
+    def decode_solution(self, solution:Solution) -> list[scheduled_course]:
+        """This function will convert a solution to the list of its scheduled courses with the names of the time slots and the classrooms.
+
+        Keyword arguments:
+
+        solution: The solution, one placement per course.
+        """
+        decoded = []
+        for course_index, placement in enumerate(solution):
+            classroom_id, start = divmod(placement, self.slot_count)
+            Course = self.courses[course_index]
+            decoded.append(scheduled_course(Course, self.time_slots[start:(start+Course.hours)], self.classroom_names[classroom_id], self.block_mask(course_index, start)))
+        return decoded
+
+    def assign(self, course_index:int, classroom_id:int, time_slot_mask:int) -> None:
+        """This function will mark the time slots of the assigned course as occupied in the occupancy index.
+
+        Keyword arguments:
+
+        course_index: Index of the course that is added to the schedule.
+
+        classroom_id: Index of the classroom of the course.
+
+        time_slot_mask: The bitmask of the time slots of the course.
+        """
+        self.classroom_occupancy[classroom_id] |= time_slot_mask
+        self.instructor_occupancy[self.course_instructors[course_index]] |= time_slot_mask
+        for index in self.course_coordinations[course_index]:
+            self.coordination_occupancy[index] |= time_slot_mask
+
+    def unassign(self, course_index:int, classroom_id:int, time_slot_mask:int) -> None:
+        """This function will free the time slots of the removed course in the occupancy index.
+
+        Keyword arguments:
+
+        course_index: Index of the course that is removed from the schedule.
+
+        classroom_id: Index of the classroom of the course.
+
+        time_slot_mask: The bitmask of the time slots of the course.
+        """
+        mask = ~time_slot_mask
+        self.classroom_occupancy[classroom_id] &= mask
+        self.instructor_occupancy[self.course_instructors[course_index]] &= mask
+        for index in self.course_coordinations[course_index]:
+            self.coordination_occupancy[index] &= mask
+
+    def exclusive_classroom(self, time_slot_mask:int, classroom_id:int) -> bool:
+        """This function will check if the time slots are available for the classroom.
+
+        Keyword arguments:
+
+        time_slot_mask: The bitmask of the time slots that we try to assign the new course.
+
+        classroom_id: Index of the classroom that we try to assign the new course.
+        """
+        return not (self.classroom_occupancy[classroom_id] & time_slot_mask)
 
     def capacity_compliance(self,to_be_assigned_course:course, classroom:str) -> bool:
         """This function will check if the classroom has enough capacity for the course.
@@ -54,22 +223,16 @@ class CourseSchedulingCSP:
         """
         return to_be_assigned_course.students <= self.classrooms[classroom]
     
-    def instructor_availability(self,to_be_assigned_course:course,schedule:list[scheduled_course], time_slot) -> bool:
-        """This function will check if the instructor is already assigned to another course in this time slot or not.
+    def instructor_availability(self, instructor_id:int, time_slot_mask:int) -> bool:
+        """This function will check if the instructor is already assigned to another course in these time slots or not.
 
         Keyword arguments:
 
-        to_be_assigned_course: The to be assigned course object.
-
-        schedule: Contains already assigned courses and their time slots with the classroom.
+        instructor_id: Index of the instructor of the to be assigned course.
 
-        time_slot: The time slot that we try to assign the new course.
+        time_slot_mask: The bitmask of the time slots that we try to assign the new course.
         """
-        for assigned_course in schedule:
-            if(assigned_course.Course.instructor == to_be_assigned_course.instructor):
-                if(time_slot in assigned_course.time_slots):
-                    return False
-        return True
+        return not (self.instructor_occupancy[instructor_id] & time_slot_mask)
     
     def consecutive_scheduling(self, assigned_time_slots:list[str]) -> bool:
         """This function will check if the time slot array is consecutive or not.
@@ -85,109 +248,541 @@ class CourseSchedulingCSP:
                 return False
         return True
     
-    def instructor_preferences_compliance(self, to_be_assigned_course:course, time_slot) -> bool:
-        """This function will check if the time slots complies with the preferences of the instructor.
+    def instructor_preferences_compliance(self, instructor_id:int, time_slot_mask:int) -> bool:
+        """This function will check if the time slots comply with the preferences of the instructor.
 
         Keyword arguments:
 
-        to_be_assigned_course: The to be assigned course object.
+        instructor_id: Index of the instructor of the to be assigned course.
 
-        time_slot: The time slot that we try to assign the new course.
+        time_slot_mask: The bitmask of the time slots that we try to assign the new course.
         """
-        return time_slot in self.preferences[to_be_assigned_course.instructor]
+        return (time_slot_mask & self.preference_masks[instructor_id]) == time_slot_mask
     
-    def coordination_restrictions(self, to_be_assigned_course:course, schedule:list[scheduled_course], time_slot) -> bool:
+    def coordination_restrictions(self, course_index:int, time_slot_mask:int) -> bool:
         """This function will check if the to be assigned course does have any coordination restriction and checks if it complies with already assigned courses.
 
         Keyword arguments:
 
-        to_be_assigned_course: The to be assigned course object.
+        course_index: Index of the to be assigned course.
 
-        schedule: Contains already assigned courses and their time slots with the classroom.
-
-        time_slot: The time slot that we try to assign the new course.
+        time_slot_mask: The bitmask of the time slots that we try to assign the new course.
         """
-        for assigned_course in schedule:
-            for coordination in self.coordinations:
-                if((to_be_assigned_course.name in coordination) and (assigned_course.Course.name in coordination)):
-                    if(time_slot in assigned_course.time_slots):
-                        return False
+        for index in self.course_coordinations[course_index]: #Only the coordination groups that contain the course are checked.
+            if(self.coordination_occupancy[index] & time_slot_mask):
+                return False
         return True
     
-    def backtrack(self, schedule:list[scheduled_course]) -> None:
+    def backtrack(self, schedule:list[int], depth:int | None = None) -> Iterator[Solution]:
         """This function is the main solver of our class.In every function call, it will try to assign a new course to the solution and checks if it complies with all the restrictions.
         If the course complies with all the restrictions in that assigned classroom and the time slots, it adds it to the schedule list and goes for the next course.When it finishes
-        assigning all the courses, it adds the schedule in the solutions list and starts backtracking and finds a new solution.In this way, the algoritm is able to find all possible
-        solutions with the given constraints and the datas.
+        assigning all the courses, it yields the schedule as a solution tuple and starts backtracking and finds a new solution.In this way, the algoritm is able to find all possible
+        solutions with the given constraints and the datas, and every solution is available as soon as it is found.
 
         Keyword arguments:
 
-        schedule: Contains already assigned courses and their time slots with the classroom.
+        schedule: Contains the placements of the already assigned courses, in the order of the courses list.
+
+        depth: If it is given, the search stops when this many courses are assigned and yields the partial schedules instead.
         """
-        if(len(schedule) == len(self.courses)): #Base case is that the schedule has all the courses assigned.
-            solution = []
-            for Course in schedule: #Create a deep copy since the schedule's elements will be removed later.
-                solution.append(Course)
-            self.solutions.append(solution)
+        self.explored_nodes += 1
+        course_index = len(schedule) #The next course to be assigned.
+        if(course_index == (len(self.courses) if depth is None else depth)): #Base case is that the schedule has all the courses assigned.
+            yield tuple(schedule)
             return
         
-        to_be_assigned_course = self.courses[len(schedule)] #Choose the next course to be assigned.
+        instructor_id = self.course_instructors[course_index]
 
-        for classroom in self.classrooms:
-            if(not self.capacity_compliance(to_be_assigned_course, classroom)): #This is checked here because there is no need to check other requirements if the class is not suitible.
+        for classroom_id, time_slot_mask, placement in self.static_domains[course_index]: #Capacity, consecutiveness and preferences are already satisfied by the static domain.
+            if(not self.exclusive_classroom(time_slot_mask, classroom_id)):
                 continue
-            for time_slot in self.time_slots:
-                index = self.time_slots.index(time_slot)
-                to_be_assigned_time_slots = self.time_slots[index:(index+to_be_assigned_course.hours)] #For a time slot, I created a block of time slots that the course will be in and check if its consecutive.
-                if(not self.consecutive_scheduling(to_be_assigned_time_slots)):                        #If it is, then the algorithm will check if all the time slots are suitible for assignment.
+            if(not self.instructor_availability(instructor_id, time_slot_mask)):
+                continue
+            if(not self.coordination_restrictions(course_index, time_slot_mask)):
+                continue
+
+            #If all the constraints are satisfied, the algorithm assigns the course to the specific class and time slots.
+            schedule.append(placement)
+            self.assign(course_index, classroom_id, time_slot_mask)
+
+            try:
+                yield from self.backtrack(schedule, depth)
+            finally: #This also runs when the search is stopped early, so the occupancy index is always left clean.
+                self.unassign(course_index, classroom_id, time_slot_mask)
+                schedule.pop() #The course is removed from the schedule because we want to find all the solutions.If this is not done, the algoritm only finds a single solution.
+
+    def start_domain(self, course_index:int) -> dict[int, int]:
+        """This function will return the static domain of the course as a bitmask of the possible start time slots for every classroom id, which is the domain form of the mrv search.
+
+        Keyword arguments:
+
+        course_index: Index of the course in the courses list.
+        """
+        domain = {}
+        for classroom_id, time_slot_mask, placement in self.static_domains[course_index]:
+            domain[classroom_id] = domain.get(classroom_id, 0) | (time_slot_mask & -time_slot_mask) #The lowest bit of the block is its start time slot.
+        return domain
+
+    def blocked_starts(self, time_slot_mask:int, hours:int) -> int:
+        """This function will return the bitmask of the start time slots whose block of the given length overlaps the time slot mask.
+
+        Keyword arguments:
+
+        time_slot_mask: The bitmask of the occupied time slots.
+
+        hours: The length of the block.
+        """
+        blocked = 0
+        for shift in range(hours):
+            blocked |= time_slot_mask >> shift
+        return blocked
+
+    def forward_check(self, course_index:int, classroom_id:int, time_slot_mask:int, domains:dict[int, dict[int, int]]) -> dict[int, dict[int, int]] | None:
+        """This function will remove the values that conflict with the newly assigned course from the domains of the unassigned courses.
+        It returns the pruned domains, or None if a domain becomes empty since then the assignment can not lead to a solution.
+
+        Keyword arguments:
+
+        course_index: Index of the newly assigned course.
+
+        classroom_id: Index of the classroom of the newly assigned course.
+
+        time_slot_mask: The bitmask of the time slots of the newly assigned course.
+
+        domains: The current domains of the unassigned courses.
+        """
+        neighbours = self.constraint_neighbours[course_index]
+        pruned_domains = {}
+        for index, domain in domains.items():
+            allowed = ~self.blocked_starts(time_slot_mask, self.course_hours[index])
+            if(index in neighbours): #Same instructor or coordinated courses can not overlap in any classroom.
+                pruned_domain = {other_classroom: starts & allowed for other_classroom, starts in domain.items() if starts & allowed}
+            elif(domain.get(classroom_id, 0) & ~allowed): #Other courses can only conflict by using the same classroom.
+                pruned_domain = dict(domain)
+                if(domain[classroom_id] & allowed):
+                    pruned_domain[classroom_id] = domain[classroom_id] & allowed
+                else:
+                    del pruned_domain[classroom_id]
+            else: #Nothing is removed, the domain is shared since domains are never modified in place.
+                pruned_domain = domain
+            if(not pruned_domain):
+                return None
+            pruned_domains[index] = pruned_domain
+        return pruned_domains
+
+    def backtrack_mrv(self, schedule:list[int | None], domains:dict[int, dict[int, int]]) -> Iterator[Solution]:
+        """This function is the alternative solver that chooses the course with the minimum remaining values first and applies forward checking after every assignment.
+        Every value left in a domain is consistent with the schedule, so no constraint is checked during the search. It finds the same solutions as backtrack,
+        but in a different order.
+
+        Keyword arguments:
+
+        schedule: Contains the placement of every course in the order of the courses list, None for the unassigned courses.
+
+        domains: Contains the remaining start time slots of every unassigned course for every classroom id, keyed by the index of the course.
+        """
+        self.explored_nodes += 1
+        if(not domains): #Base case is that the schedule has all the courses assigned.
+            yield tuple(schedule)
+            return
+
+        course_index = min(domains, key=lambda index: (sum(starts.bit_count() for starts in domains[index].values()), index)) #Minimum remaining values, ties are broken by the order of the courses.
+        unassigned_domains = {index: domain for index, domain in domains.items() if index != course_index}
+
+        for classroom_id, starts in domains[course_index].items():
+            while(starts):
+                start = (starts & -starts).bit_length() - 1 #Values are tried in the same order as the static domain.
+                starts &= starts - 1
+                time_slot_mask = self.block_mask(course_index, start)
+                pruned_domains = self.forward_check(course_index, classroom_id, time_slot_mask, unassigned_domains)
+                if(pruned_domains is None):
                     continue
-                willBeAssigned = True
-                for assignable_time_slot in to_be_assigned_time_slots:
-                    if(not self.instructor_preferences_compliance(to_be_assigned_course, assignable_time_slot)): #This is checked first because this constraint is most of the time the most decisive.
-                        willBeAssigned = False
-                        break
-                    if(not self.exclusive_classroom(schedule, assignable_time_slot, classroom)):
-                        willBeAssigned = False
-                        break
-                    if(not self.instructor_availability(to_be_assigned_course, schedule, assignable_time_slot)):
-                        willBeAssigned = False
-                        break
-                    if(not self.coordination_restrictions(to_be_assigned_course, schedule, assignable_time_slot)):
-                        willBeAssigned = False
+                schedule[course_index] = classroom_id * self.slot_count + start
+
+                try:
+                    yield from self.backtrack_mrv(schedule, pruned_domains)
+                finally:
+                    schedule[course_index] = None
+
+    def iter_prefixes(self, depth:int) -> Iterator[Solution]:
+        """This function will yield every consistent assignment of the first depth courses in the order that backtrack visits them.
+        Every prefix is the root of an independent subtree of the search.
+
+        Keyword arguments:
+
+        depth: The number of the courses that are assigned in a prefix.
+        """
+        return self.backtrack([], depth)
+
+    def solve_subtree(self, prefix:Solution, limit:int | None = None) -> tuple[list[Solution], int]:
+        """This function will find the solutions below a prefix with the fixed order search. It returns the solutions and the number of the explored nodes
+        below the prefix, the prefix node itself is already counted by iter_prefixes.
+
+        Keyword arguments:
+
+        prefix: The placements of the first courses, see iter_prefixes.
+
+        limit: The search of the subtree stops after this many solutions. None means all the solutions.
+        """
+        explored_nodes = self.explored_nodes
+        assignments = [(course_index, placement // self.slot_count, self.block_mask(course_index, placement % self.slot_count)) for course_index, placement in enumerate(prefix)]
+        for assignment in assignments:
+            self.assign(*assignment)
+        search = self.backtrack(list(prefix))
+        try:
+            solutions = list(itertools.islice(search, limit))
+        finally:
+            search.close() #Unassigns the courses of a stopped search, see iter_solutions.
+        for assignment in assignments:
+            self.unassign(*assignment)
+        explored_nodes = self.explored_nodes - explored_nodes
+        return solutions, explored_nodes - 1 if explored_nodes else 0 #A search that never started (limit 0) did not visit the prefix node either.
+
+    def iter_parallel_solutions(self, workers:int, split_depth:int = 2, ordered:bool = True, limit:int | None = None) -> Iterator[Solution]:
+        """This function will split the fixed order search at the split depth and solve the subtrees in a pool of worker processes.
+        The subtrees are handed to the workers one by one, so a worker that finishes a small subtree immediately takes the next one and large subtrees do not
+        keep the other workers idle. A larger split depth gives more and smaller subtrees, which balances the work better.
+
+        Keyword arguments:
+
+        workers: The number of the worker processes.
+
+        split_depth: The number of the courses that are assigned before the search is split.
+
+        ordered: If True, the solutions are yielded in the same order as the serial search. If False, they are yielded as soon as a subtree is finished.
+
+        limit: The search stops after this many solutions. None means all the solutions. A subtree never returns more than limit solutions, so the workers
+        do not enumerate and send whole subtrees that are not needed.
+        """
+        if(limit == 0):
+            return
+        #The prefixes are found here, before the pool starts, because the pool consumes its input in a thread and the search changes the occupancy index of this object.
+        prefixes = list(self.iter_prefixes(min(split_depth, len(self.courses))))
+        problem = (self.courses, self.classrooms, self.preferences, self.coordinations, self.time_slots)
+        solve = functools.partial(_solve_subtree, limit=limit)
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=problem) as pool:
+            results = pool.imap(solve, prefixes) if ordered else pool.imap_unordered(solve, prefixes)
+            count = 0
+            for subtree_solutions, explored_nodes in results:
+                self.explored_nodes += explored_nodes #The nodes are counted in the workers.
+                for solution in subtree_solutions:
+                    if(limit is not None and count >= limit):
+                        return
+                    count += 1
+                    yield solution
+
+    def iter_repaired_solutions(self, previous_solutions:Iterable[dict[str, tuple[str, str]]], changed:set[str]) -> Iterator[Solution]:
+        """This function will re-solve the problem incrementally from the solutions of a previous version of the problem.
+        Every previous solution is re-validated: the courses that are not changed keep their previous time slots and classrooms if they still satisfy all the constraints,
+        and only the changed courses and the courses that became invalid are searched again, with the minimum remaining values search. A still valid previous solution
+        is therefore found again, together with its alternatives where only the affected courses are moved. Solutions where an unaffected course moves are not searched,
+        run the full search for those.
+
+        Keyword arguments:
+
+        previous_solutions: Every previous solution as a dictionary from the course name to its (first time slot, classroom) pair, see read_solutions.
+
+        changed: The names of the courses that are changed between the problems, see changed_courses.
+        """
+        time_slot_ids = {time_slot: index for index, time_slot in enumerate(self.time_slots)}
+        classroom_ids = {classroom: index for index, classroom in enumerate(self.classroom_names)}
+        static_placements = [{placement for classroom_id, time_slot_mask, placement in domain} for domain in self.static_domains]
+        unchanged_courses = [Course.name for Course in self.courses if Course.name not in changed]
+        validated_solutions = set() #Previous solutions that only differ in the changed courses give the same solutions, so they are validated once.
+        searched_schedules = set() #Previous solutions with the same kept courses give the same solutions, so they are searched once.
+        found_solutions = set()
+        for previous_solution in previous_solutions:
+            unchanged_part = tuple(previous_solution.get(name) for name in unchanged_courses)
+            if(unchanged_part in validated_solutions):
+                continue
+            validated_solutions.add(unchanged_part)
+            schedule = [None] * len(self.courses)
+            kept_assignments = []
+            for course_index, Course in enumerate(self.courses):
+                if(Course.name in changed or Course.name not in previous_solution):
+                    continue
+                time_slot, classroom = previous_solution[Course.name]
+                if(time_slot not in time_slot_ids or classroom not in classroom_ids):
+                    continue
+                classroom_id = classroom_ids[classroom]
+                placement = classroom_id * self.slot_count + time_slot_ids[time_slot]
+                if(placement not in static_placements[course_index]): #Capacity, consecutiveness or preferences are not satisfied anymore.
+                    continue
+                time_slot_mask = self.block_mask(course_index, time_slot_ids[time_slot])
+                if(not (self.exclusive_classroom(time_slot_mask, classroom_id) and self.instructor_availability(self.course_instructors[course_index], time_slot_mask) and self.coordination_restrictions(course_index, time_slot_mask))):
+                    continue #The course conflicts with a kept course, so it is searched again.
+                self.assign(course_index, classroom_id, time_slot_mask)
+                kept_assignments.append((course_index, classroom_id, time_slot_mask))
+                schedule[course_index] = placement
+            try:
+                if(tuple(schedule) in searched_schedules):
+                    continue
+                searched_schedules.add(tuple(schedule))
+                domains = {course_index: self.start_domain(course_index) for course_index, placement in enumerate(schedule) if placement is None}
+                if(not all(domains.values())):
+                    continue
+                for assignment in kept_assignments: #The kept courses are already assigned, so they prune the domains of the searched courses.
+                    domains = self.forward_check(*assignment, domains)
+                    if(domains is None):
                         break
-                
-                if(willBeAssigned): #If all the constraints are satisfied, the algorithm assigns the course to the specific class and time slots.
-                    assigned_course = scheduled_course(to_be_assigned_course, to_be_assigned_time_slots, classroom)
-                    schedule.append(assigned_course)
+                if(domains is None):
+                    continue
+                for solution in self.backtrack_mrv(schedule, domains):
+                    if(solution not in found_solutions):
+                        found_solutions.add(solution)
+                        yield solution
+            finally:
+                for assignment in kept_assignments:
+                    self.unassign(*assignment)
+
+    def iter_solutions(self, search:str = "fixed", limit:int | None = None) -> Iterator[Solution]:
+        """This function will yield the solutions one by one while the search goes on, so nothing is kept in memory after a solution is consumed.
+        When the limit is reached, the search is closed so that the solver can be searched again.
 
-                    self.backtrack(schedule) 
-                    
-                    schedule.remove(assigned_course) #The course is removed from the schedule because we want to find all the solutions.If this is not done, the algoritm only finds a single solution.
+        Keyword arguments:
 
+        search: "fixed" assigns the courses in the order of the courses list, "mrv" uses minimum remaining values ordering with forward checking.
 
-def main():
-    #Reading the data from problem here
+        limit: The search stops after this many solutions. None means all the solutions.
+        """
+        if(search == "mrv"):
+            solutions = self.backtrack_mrv([None] * len(self.courses), {index: self.start_domain(index) for index in range(len(self.courses))})
+        else:
+            solutions = self.backtrack([])
+        try:
+            yield from itertools.islice(solutions, limit)
+        finally:
+            solutions.close()
+
+    def solve(self, search:str = "fixed", limit:int | None = None) -> None:
+        """This function will find the solutions with the chosen search and store them in the solutions list.
+
+        Keyword arguments:
+
+        search: "fixed" or "mrv", see iter_solutions.
+
+        limit: The search stops after this many solutions. None means all the solutions.
+        """
+        self.solutions.extend(self.iter_solutions(search, limit))
+
+
+    def wasted_capacity(self, course_index:int, classroom_id:int, time_slot_mask:int) -> int:
+        """This function will return the empty seats of the classroom times the hours of the course.
+
+        Keyword arguments:
+
+        course_index: Index of the course.
+
+        classroom_id: Index of the classroom of the course.
+
+        time_slot_mask: The bitmask of the time slots of the course.
+        """
+        return (self.classrooms[self.classroom_names[classroom_id]] - self.courses[course_index].students) * time_slot_mask.bit_count()
+
+    def instructor_cost(self, instructor_time_slots:int, complete:bool, weights:objective_weights) -> float:
+        """This function will return the weighted day and gap cost of an instructor with the given time slots.
+        If the instructor has unassigned courses, it returns a lower bound instead: gaps may still be filled and every instructor teaches at least one day.
+
+        Keyword arguments:
+
+        instructor_time_slots: The bitmask of the time slots that the instructor teaches.
+
+        complete: True if all the courses of the instructor are assigned.
+
+        weights: The weights of the costs.
+        """
+        days = 0
+        gaps = 0
+        for day_mask in self.day_masks:
+            day = instructor_time_slots & day_mask
+            if(day):
+                days += 1
+                gaps += day.bit_length() - (day & -day).bit_length() + 1 - day.bit_count() #The empty slots between the first and the last course of the day.
+        if(not complete):
+            return weights.days * max(days, 1)
+        return weights.days * days + weights.gaps * gaps
+
+    def solution_cost(self, solution:Solution, weights:objective_weights) -> float:
+        """This function will return the weighted soft constraint cost of a solution.
+
+        Keyword arguments:
+
+        solution: The solution, one placement per course.
+
+        weights: The weights of the costs.
+        """
+        cost = 0
+        instructor_time_slots = [0] * len(self.instructor_names)
+        for course_index, placement in enumerate(solution):
+            classroom_id, start = divmod(placement, self.slot_count)
+            time_slot_mask = self.block_mask(course_index, start)
+            cost += weights.waste * self.wasted_capacity(course_index, classroom_id, time_slot_mask)
+            instructor_time_slots[self.course_instructors[course_index]] |= time_slot_mask
+        for time_slot_mask in instructor_time_slots:
+            cost += self.instructor_cost(time_slot_mask, True, weights)
+        return cost
+
+    def branch_and_bound(self, schedule:list[int], bound:float, weights:objective_weights, waste_costs:list[list[float]], min_waste_costs:list[float], top_k:int, deadline:float) -> Iterator[tuple[float, float, Solution]]:
+        """This function is the fixed order search of the optimization mode. The bound of a node is the cost of the assigned courses plus the lowest wasted capacity
+        of every unassigned course and the lowest day cost of the instructors that are not complete. It never overestimates, so a subtree whose bound is not better than the
+        k-th best solution found so far can be pruned. The children are visited in the order of their bounds, so good solutions are found early.
+        It yields (cost, lower bound, solution) every time a solution enters the best k solutions, where the lower bound is the lowest bound of the unexplored subtrees.
+
+        Keyword arguments:
+
+        schedule: Contains the placements of the already assigned courses, in the order of the courses list.
+
+        bound: The bound of the node.
+
+        weights: The weights of the costs.
+
+        waste_costs: The weighted wasted capacity of every value in the static domain of every course.
+
+        min_waste_costs: The lowest weighted wasted capacity of every course.
+
+        top_k: The number of the best solutions that are kept.
+
+        deadline: The search stops at this time.monotonic() value.
+        """
+        self.explored_nodes += 1
+        course_index = len(schedule)
+        if(course_index == len(self.courses)): #The bound of a complete schedule is its cost, but it is computed again so the rounding of the path does not add up.
+            cost = self.solution_cost(tuple(schedule), weights)
+            heapq.heappush(self.best_solutions, (-cost, self.explored_nodes, tuple(schedule)))
+            if(len(self.best_solutions) > top_k):
+                heapq.heappop(self.best_solutions)
+            best_cost = min(-cost for cost, _, _ in self.best_solutions)
+            yield cost, min([best_cost] + self.open_bounds), tuple(schedule)
+            return
+        if(time.monotonic() > deadline):
+            self.optimization_complete = False
+            return
+
+        instructor_id = self.course_instructors[course_index]
+        complete = self.last_courses[instructor_id] == course_index
+        instructor_time_slots = self.instructor_occupancy[instructor_id]
+        base_bound = bound - min_waste_costs[course_index] - self.instructor_cost(instructor_time_slots, False, weights)
+
+        children = []
+        for value_index, (classroom_id, time_slot_mask, placement) in enumerate(self.static_domains[course_index]):
+            if(not self.exclusive_classroom(time_slot_mask, classroom_id)):
+                continue
+            if(not self.instructor_availability(instructor_id, time_slot_mask)):
+                continue
+            if(not self.coordination_restrictions(course_index, time_slot_mask)):
+                continue
+            child_bound = base_bound + waste_costs[course_index][value_index] + self.instructor_cost(instructor_time_slots | time_slot_mask, complete, weights)
+            children.append((child_bound, value_index))
+        children.sort()
+
+        for child_number, (child_bound, value_index) in enumerate(children):
+            threshold = -self.best_solutions[0][0] if len(self.best_solutions) == top_k else math.inf
+            if(child_bound >= threshold): #The children are sorted, so the rest of them can not be better either.
+                break
+            self.open_bounds[course_index] = children[child_number+1][0] if child_number + 1 < len(children) else math.inf
+            classroom_id, time_slot_mask, placement = self.static_domains[course_index][value_index]
+            schedule.append(placement)
+            self.assign(course_index, classroom_id, time_slot_mask)
+            try:
+                yield from self.branch_and_bound(schedule, child_bound, weights, waste_costs, min_waste_costs, top_k, deadline)
+            finally:
+                self.unassign(course_index, classroom_id, time_slot_mask)
+                schedule.pop()
+        self.open_bounds[course_index] = math.inf
+
+    def iter_optimize(self, weights:objective_weights, top_k:int = 1, time_limit:float | None = None) -> Iterator[tuple[float, float, Solution]]:
+        """This function will search for the solutions with the lowest cost with branch and bound. It is an anytime search: it yields (cost, lower bound, solution)
+        every time a solution enters the best k solutions, so the search can be stopped at any time with the best solutions so far. No solution can be cheaper than the lower bound.
+        The best solutions are kept in best_solutions, see optimize. optimization_complete tells if they are proven to be the best ones or the time limit was reached.
+
+        Keyword arguments:
+
+        weights: The weights of the costs, none of them can be negative because the bound would not be a lower bound anymore.
+
+        top_k: The number of the best solutions that are kept, at least 1.
+
+        time_limit: The search stops after this many seconds. None means no limit.
+        """
+        if(top_k < 1):
+            raise ValueError("top_k must be at least 1")
+        if(min(weights.waste, weights.gaps, weights.days) < 0):
+            raise ValueError("the weights must not be negative")
+        self.best_solutions = [] #A heap of (-cost, found order, solution), the worst of the best solutions is on top.
+        self.open_bounds = [math.inf] * len(self.courses) #The bound of the next unexplored child at every depth of the current path.
+        self.optimization_complete = True
+        if(not all(self.static_domains)):
+            return
+        waste_costs = [[weights.waste * self.wasted_capacity(course_index, classroom_id, time_slot_mask) for classroom_id, time_slot_mask, placement in domain] for course_index, domain in enumerate(self.static_domains)]
+        min_waste_costs = [min(costs) for costs in waste_costs]
+        root_bound = sum(min_waste_costs) + sum(self.instructor_cost(time_slot_mask, False, weights) for time_slot_mask in self.instructor_occupancy)
+        deadline = math.inf if time_limit is None else time.monotonic() + time_limit
+        yield from self.branch_and_bound([], root_bound, weights, waste_costs, min_waste_costs, top_k, deadline)
+
+    def optimize(self, weights:objective_weights, top_k:int = 1, time_limit:float | None = None) -> list[tuple[float, Solution]]:
+        """This function will return the best k solutions as (cost, solution) pairs from the cheapest, see iter_optimize.
+
+        Keyword arguments:
+
+        weights: The weights of the costs.
+
+        top_k: The number of the best solutions that are returned.
+
+        time_limit: The search stops after this many seconds and the best solutions so far are returned. None means no limit.
+        """
+        for _ in self.iter_optimize(weights, top_k, time_limit):
+            pass
+        return self.ranked_solutions()
+
+    def ranked_solutions(self) -> list[tuple[float, Solution]]:
+        """This function will return the best solutions of the last optimization as (cost, solution) pairs from the cheapest."""
+        return sorted((-cost, solution) for cost, _, solution in self.best_solutions)
+
+_worker_problem = None #The problem of a worker process, it is created once per process by _init_worker.
+
+def _init_worker(courses:list[course], classrooms:dict[str,int], preferences:dict[str, list[str]], coordinations:list[list[str]], time_slots:list[str]) -> None:
+    """This function will create the problem of a worker process once, so it is not sent with every subtree."""
+    global _worker_problem
+    _worker_problem = CourseSchedulingCSP(courses, classrooms, preferences, coordinations, time_slots)
+
+def _solve_subtree(prefix:Solution, limit:int | None = None) -> tuple[list[Solution], int]:
+    """This function will solve a subtree in a worker process, see CourseSchedulingCSP.solve_subtree."""
+    return _worker_problem.solve_subtree(prefix, limit)
+
+
+TIME_SLOTS = ["Mon1","Mon2","Mon3","Mon4","Mon5","Mon6","Mon7","Mon8",
+            "Tue1","Tue2","Tue3","Tue4","Tue5","Tue6","Tue7","Tue8",
+            "Wed1","Wed2","Wed3","Wed4","Wed5","Wed6","Wed7","Wed8",
+            "Thu1","Thu2","Thu3","Thu4","Thu5","Thu6","Thu7","Thu8",
+            "Fri1","Fri2","Fri3","Fri4","Fri5","Fri6","Fri7","Fri8",]
+
+def read_problem(problem_path:str) -> tuple[list[course], dict[str,int], dict[str, list[str]], list[list[str]]]:
+    """This function will read the courses, classrooms, preferences and coordinations of a problem directory.
+
+    Keyword arguments:
+
+    problem_path: The directory that contains the csv files of the problem.
+    """
     courses = []
-    with open(sys.argv[1]+"/courses.csv") as file:
+    with open(problem_path+"/courses.csv") as file:
         reader = csv.DictReader(file)
         for row in reader:
             Course = course(row['Course'], row['Instructor'], int(row['Students']), int(row['Hours']))
             courses.append(Course)
 
     classrooms = {}
-    with open(sys.argv[1]+"/classrooms.csv") as file:
+    with open(problem_path+"/classrooms.csv") as file:
         reader = csv.DictReader(file)
         for row in reader:
             classrooms[row["Classroom"]] = int(row["Capacity"])
 
     preferences = {}
-    with open(sys.argv[1]+"/preferences.csv") as file:
+    with open(problem_path+"/preferences.csv") as file:
         reader = csv.DictReader(file)
         for row in reader:
             preferences[row['Instructor']] = row['Times'].split()
 
     coordinations = []
-    with open(sys.argv[1]+"/coordinations.csv") as file:
+    with open(problem_path+"/coordinations.csv") as file:
         reader = csv.reader(file)
         for row in reader:
             if(row == ["Courses"]):
@@ -196,23 +791,184 @@ def main():
             coordinated_courses = coordinated_courses.split()
             coordinations.append(coordinated_courses)
 
-    time_slots = ["Mon1","Mon2","Mon3","Mon4","Mon5","Mon6","Mon7","Mon8",
-                "Tue1","Tue2","Tue3","Tue4","Tue5","Tue6","Tue7","Tue8",
-                "Wed1","Wed2","Wed3","Wed4","Wed5","Wed6","Wed7","Wed8",
-                "Thu1","Thu2","Thu3","Thu4","Thu5","Thu6","Thu7","Thu8",
-                "Fri1","Fri2","Fri3","Fri4","Fri5","Fri6","Fri7","Fri8",]
+    return courses, classrooms, preferences, coordinations
+
+def changed_courses(previous_problem:tuple[list[course], dict[str,int], dict[str, list[str]], list[list[str]]], problem:tuple[list[course], dict[str,int], dict[str, list[str]], list[list[str]]]) -> set[str]:
+    """This function will return the names of the courses of the new problem whose constraints are changed: new courses, changed course rows, changed preferences of
+    the instructor, changed coordination groups of the course and classrooms whose capacity changed for the course.
+
+    Keyword arguments:
+
+    previous_problem: The previous problem, as read_problem returns it.
+
+    problem: The new problem, as read_problem returns it.
+    """
+    previous_courses, previous_classrooms, previous_preferences, previous_coordinations = previous_problem
+    courses, classrooms, preferences, coordinations = problem
+    previous_rows = {Course.name: (Course.instructor, Course.students, Course.hours) for Course in previous_courses}
+    changed_groups = {frozenset(coordination) for coordination in previous_coordinations} ^ {frozenset(coordination) for coordination in coordinations}
+    coordinated_courses = set().union(*changed_groups)
+    changed_capacities = [(previous_classrooms.get(classroom, 0), classrooms.get(classroom, 0)) for classroom in previous_classrooms.keys() | classrooms.keys() if previous_classrooms.get(classroom, 0) != classrooms.get(classroom, 0)]
+
+    changed = set()
+    for Course in courses:
+        if(previous_rows.get(Course.name) != (Course.instructor, Course.students, Course.hours)):
+            changed.add(Course.name)
+        elif(previous_preferences.get(Course.instructor) != preferences.get(Course.instructor)):
+            changed.add(Course.name)
+        elif(Course.name in coordinated_courses):
+            changed.add(Course.name)
+        elif(any(min(capacities) < Course.students <= max(capacities) for capacities in changed_capacities)): #The course fits the classroom in only one of the problems.
+            changed.add(Course.name)
+    return changed
+
+def read_solutions(solutions_path:str) -> Iterator[dict[str, tuple[str, str]]]:
+    """This function will read the solutions that are written by write_solution_files or write_solution_rows, in the order of their indices.
+    Every solution is a dictionary from the course name to its (first time slot, classroom) pair.
+
+    Keyword arguments:
+
+    solutions_path: The directory of the csv files of the solutions, or the csv file with one row per solution.
+    """
+    if(os.path.isdir(solutions_path)):
+        file_names = sorted((file_name for file_name in os.listdir(solutions_path) if file_name.removesuffix(".csv").isdigit()), key=lambda file_name: int(file_name.removesuffix(".csv")))
+        for file_name in file_names:
+            with open(os.path.join(solutions_path, file_name)) as file:
+                yield {row["Course"]: (row["Time"], row["Classroom"]) for row in csv.DictReader(file)}
+    else:
+        with open(solutions_path) as file:
+            reader = csv.reader(file)
+            course_names = next(reader)[1:]
+            for row in reader:
+                yield {name: tuple(cell.split()) for name, cell in zip(course_names, row[1:])}
+
+def write_solution_files(problem:CourseSchedulingCSP, solutions:Iterable[Solution], solutions_path:str) -> int:
+    """This function will write every solution to its own csv file named with its index, as soon as the solution is found. It returns the number of the solutions.
+
+    Keyword arguments:
+
+    problem: The problem that the solutions belong to.
+
+    solutions: The solutions, for example the iter_solutions generator.
+
+    solutions_path: The directory that the csv files are written to.
+    """
+    count = 0
+    for count, solution in enumerate(solutions, start=1):
+        with open((solutions_path + f"/{count}.csv"), "w") as output_file:
+            output_file.write("Course,Time,Classroom\n")
+            for assigned_course in problem.decode_solution(solution):
+                output_file.write(f"{assigned_course.Course.name},{assigned_course.time_slots[0]},{assigned_course.classroom}\n")
+    return count
 
-    #Solving the problem
-    course_scheduling_problem = CourseSchedulingCSP(courses, classrooms, preferences, coordinations, time_slots)
+def write_solution_rows(problem:CourseSchedulingCSP, solutions:Iterable[Solution], output_path:str) -> int:
+    """This function will write all the solutions to a single csv file with one row per solution, as soon as every solution is found. It returns the number of the solutions.
+    The header is the solution index and the course names, and every cell is the first time slot and the classroom of the course, for example "Tue5 D0".
 
-    course_scheduling_problem.backtrack([])
+    Keyword arguments:
 
-    #To create a csv for every solution with its index.
-    for index, solution in enumerate(course_scheduling_problem.solutions, start=1):
-        with open((sys.argv[2] + f"/{index}.csv"), "w") as output_file:
-            output_file.write("Course,Time,Classroom\n")
-            for assigned_course in solution:
-                output_file.write(f"{assigned_course.Course.name},{assigned_course.time_slots[0]},{assigned_course.classroom}\n")
+    problem: The problem that the solutions belong to.
+
+    solutions: The solutions, for example the iter_solutions generator.
+
+    output_path: The csv file that the solutions are written to.
+    """
+    count = 0
+    with open(output_path, "w", newline="") as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(["Solution"] + [Course.name for Course in problem.courses])
+        for count, solution in enumerate(solutions, start=1):
+            writer.writerow([count] + [f"{assigned_course.time_slots[0]} {assigned_course.classroom}" for assigned_course in problem.decode_solution(solution)])
+    return count
+
+LOG_FIELDS = ["event", "phase", "seconds", "cost", "lower_bound", "explored_nodes", "solutions", "complete", "courses"] #The CSV columns of the --log file.
+
+def main():
+    parser = argparse.ArgumentParser(description="Finds all the schedules that satisfy the constraints of a course scheduling problem.")
+    parser.add_argument("problem_path", help="directory that contains courses.csv, classrooms.csv, preferences.csv and coordinations.csv")
+    parser.add_argument("solutions_path", help="directory that the solution csv files are written to, or the csv file with --format single")
+    parser.add_argument("--search", choices=["fixed", "mrv"], default="fixed", help="fixed course order (default) or minimum remaining values with forward checking, which numbers the solutions in a different order")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many solutions")
+    parser.add_argument("--format", choices=["files", "single"], default="files", help="one csv file per solution (default) or a single csv file with one row per solution")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes, the search is parallel if it is more than 1 (only with --search fixed)")
+    parser.add_argument("--split-depth", type=int, default=2, help="number of the courses that are assigned before the parallel search is split into subtrees")
+    parser.add_argument("--unordered", action="store_true", help="in the parallel search, write the solutions as soon as their subtree is finished instead of in the serial order")
+    parser.add_argument("--optimize", action="store_true", help="find the cheapest schedules with branch and bound instead of all the schedules, the progress is printed while the search goes on")
+    parser.add_argument("--top-k", type=int, default=1, help="number of the cheapest schedules that --optimize writes")
+    parser.add_argument("--time-limit", type=float, default=None, help="stop --optimize after this many seconds and write the best schedules so far")
+    parser.add_argument("--waste-weight", type=float, default=1.0, help="cost of an empty seat in a classroom for an hour")
+    parser.add_argument("--gap-weight", type=float, default=1.0, help="cost of an idle time slot between two courses of an instructor on the same day")
+    parser.add_argument("--day-weight", type=float, default=1.0, help="cost of a day that an instructor teaches")
+    parser.add_argument("--previous-problem", help="directory of the previous version of the problem, re-solves incrementally from --previous-solutions by keeping the unaffected courses of every previous solution in place and searching only the changed or invalid courses")
+    parser.add_argument("--previous-solutions", help="solutions of the previous problem, a directory of csv files or a csv file written with --format single")
+    parser.add_argument("--quiet", action="store_true", help="do not print the progress, only the files are written")
+    parser.add_argument("--log", help="write the progress, a summary and the duration of every phase to this file as JSON lines, or as CSV if it ends with .csv")
+    parser.add_argument("--log-every", type=int, default=0, help="write the --log buffer after this many records instead of once at the end")
+    parser.add_argument("--timings", action="store_true", help="print the duration of every phase (load, search, write) to stderr at the end")
+    args = parser.parse_args()
+    if((args.previous_problem is None) != (args.previous_solutions is None)):
+        parser.error("--previous-problem and --previous-solutions must be used together")
+    if(args.workers > 1 and args.search != "fixed"):
+        parser.error("--workers can only be used with --search fixed")
+    if(args.limit is not None and args.limit < 0):
+        parser.error("--limit must not be negative")
+    if(args.top_k < 1):
+        parser.error("--top-k must be at least 1")
+    if(min(args.waste_weight, args.gap_weight, args.day_weight) < 0):
+        parser.error("--waste-weight, --gap-weight and --day-weight must not be negative")
+
+    with contextlib.ExitStack() as stack:
+        log = stack.enter_context(record_sink(args.log, LOG_FIELDS, args.log_every)) if args.log else None
+        def report(event:str, message:str | None = None, **record) -> None:
+            """This function will print the message unless --quiet is given and write the record to the --log file."""
+            if(message is not None and not args.quiet):
+                print(message)
+            if(log is not None):
+                log.write(event=event, **record)
+        timer = phase_timer([lambda phase, seconds: report("phase", phase=phase, seconds=seconds)])
+
+        #Reading the data from problem here
+        with timer.phase("load"):
+            courses, classrooms, preferences, coordinations = read_problem(args.problem_path)
+
+            time_slots = list(TIME_SLOTS)
+
+            course_scheduling_problem = CourseSchedulingCSP(courses, classrooms, preferences, coordinations, time_slots)
+
+        #Solving the problem, the solutions are written while the search goes on.
+        if(args.previous_problem is not None):
+            with timer.phase("load"):
+                changed = changed_courses(read_problem(args.previous_problem), (courses, classrooms, preferences, coordinations))
+            report("changed", f"Changed courses: {' '.join(sorted(changed)) if changed else 'none'}", courses=" ".join(sorted(changed)))
+            solutions = itertools.islice(course_scheduling_problem.iter_repaired_solutions(read_solutions(args.previous_solutions), changed), args.limit)
+        elif(args.optimize):
+            weights = objective_weights(args.waste_weight, args.gap_weight, args.day_weight)
+            with timer.phase("search"):
+                for _, lower_bound, _ in course_scheduling_problem.iter_optimize(weights, args.top_k, args.time_limit):
+                    cost = course_scheduling_problem.ranked_solutions()[0][0] #The best cost so far, the solution that entered the best k can be worse than it.
+                    report("incumbent", f"Incumbent cost: {cost}, lower bound: {lower_bound}, explored nodes: {course_scheduling_problem.explored_nodes}",
+                           cost=cost, lower_bound=lower_bound, explored_nodes=course_scheduling_problem.explored_nodes)
+            if(course_scheduling_problem.optimization_complete):
+                message = f"Search completed, the best schedules are optimal. Explored nodes: {course_scheduling_problem.explored_nodes}"
+            else:
+                message = f"Time limit reached, the best schedules so far are written. Explored nodes: {course_scheduling_problem.explored_nodes}"
+            report("optimization", message, explored_nodes=course_scheduling_problem.explored_nodes, complete=course_scheduling_problem.optimization_complete)
+            solutions = [solution for cost, solution in course_scheduling_problem.ranked_solutions()]
+        elif(args.workers > 1):
+            solutions = course_scheduling_problem.iter_parallel_solutions(args.workers, args.split_depth, not args.unordered, args.limit)
+        else:
+            solutions = course_scheduling_problem.iter_solutions(args.search, args.limit)
+
+        solutions = timer.split(solutions, "search", "write")
+        if(args.format == "single"):
+            count = write_solution_rows(course_scheduling_problem, solutions, args.solutions_path)
+        else: #To create a csv for every solution with its index.
+            count = write_solution_files(course_scheduling_problem, solutions, args.solutions_path)
+        report("summary", solutions=count, explored_nodes=course_scheduling_problem.explored_nodes)
+
+        if(args.timings):
+            for phase, seconds in timer.durations.items():
+                print(f"{phase}: {seconds:.3f} s", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,107 @@
+#Benchmark of the Viterbi decoders, usage: python benchmark.py
+#Decodes the test words (the words after the first 50000) with the original dictionary based decoder, kept here as a reference,
+#with the log-space matrix decoder and with the batch decoder, checks that all of them estimate the same words and prints the words per second of each.
+#Then does the same without the reference decoder for a synthetic corpus with a 300 letter alphabet, where a batch holds far fewer words.
+#Then trains on a corpus of the data files repeated 10 times with calculate_probabilities and with the streaming trainer, checks that both build the same model
+#and prints the words per second of each.
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmark_modes import generate_corpus
+from ceng461_hw2_280201033 import build_log_model, calculate_probabilities, read_data, train_model, viterbi_decode, viterbi_decode_batch
+
+def reference_viterbi_algorithm(ocr_output, initial_state_probabilities, transition_probabilities, emission_probabilities):
+    V = [{}] #Array of dictionaries that will have the form of: V[0] will be the states in first letter and the dictionary will have the letter as key and it's probability as its value
+    paths = {} #This dictionary will hold the paths that is used to reach the states. For example the path to V[3][A] will be recorded as {(3,A) : [A,B,D]}
+
+    domain = initial_state_probabilities.keys()
+
+    for letter in domain:#Initializing all first states and writing them to the first elem of array
+        V[0][letter] = emission_probabilities.get((ocr_output[0],letter), 0) * initial_state_probabilities[letter]
+        paths[(0,letter)] = []
+    
+    for i in range(1,len(ocr_output)):
+        V.append({})
+        for current_letter in domain:#Calculation of V[i][letter]
+            possible_values = {} #Letter before and probability of it being the previous letter
+            for previous_letter in domain:#Calculating all possible previous letters probability
+                possible_values[previous_letter] = emission_probabilities.get((ocr_output[i], current_letter), 0) * transition_probabilities.get((current_letter, previous_letter), 0) * V[i-1].get(previous_letter, 0)
+            max_key_value_pair = ('A', 0) #Just a placeholder for finding the key with the max value
+            for key in possible_values.keys():#Finding the previous letter that has the maximum likelihood 
+                if (possible_values[key] > max_key_value_pair[1]):
+                    max_key_value_pair = (key,possible_values[key])
+            V[i][current_letter] = max_key_value_pair[1]
+            paths[(i,current_letter)] = paths[(i-1, max_key_value_pair[0])] + [max_key_value_pair[0]]
+    
+    ocr_length_minus_1 = len(ocr_output) - 1 #Created just because (len(ocr_output)-1) is used in more than 1 place
+
+    max_probability_key_value_pair = ('A', 0) #To find the maximum probability ending state
+    for letter in domain: #Finding the maximum probability ending state
+        if(V[ocr_length_minus_1][letter] > max_probability_key_value_pair[1]):
+            max_probability_key_value_pair = (letter, V[ocr_length_minus_1][letter])
+    
+    estimated_sequence = paths[(ocr_length_minus_1, max_probability_key_value_pair[0])] + [max_probability_key_value_pair[0]]
+    estimated_word = ''.join(estimated_sequence)
+    return estimated_word
+
+def measure(decode, ocr_outputs):
+    start = time.perf_counter()
+    estimated_words = [decode(ocr_output) for ocr_output in ocr_outputs]
+    return estimated_words, time.perf_counter() - start
+
+def main():
+    actual_words, ocr_outputs = read_data('data_actual_words.txt', 'data_ocr_outputs.txt')
+    initial_state_probabilities, transition_probabilities, emission_probabilities = calculate_probabilities(actual_words[:50000], ocr_outputs[:50000])
+    test_outputs = ocr_outputs[50000:]
+
+    reference_words, reference_time = measure(lambda ocr_output: reference_viterbi_algorithm(ocr_output, initial_state_probabilities, transition_probabilities, emission_probabilities), test_outputs)
+    model = build_log_model(initial_state_probabilities, transition_probabilities, emission_probabilities)
+    matrix_words, matrix_time = measure(lambda ocr_output: viterbi_decode(ocr_output, model), test_outputs)
+
+    start = time.perf_counter()
+    batch_words = viterbi_decode_batch(test_outputs, model)
+    batch_time = time.perf_counter() - start
+
+    print(f"Identical estimations: {reference_words == matrix_words == batch_words}")
+    print(f"Reference decoder: {len(test_outputs)/reference_time:.0f} words/s")
+    print(f"Log-space matrix decoder: {len(test_outputs)/matrix_time:.0f} words/s")
+    print(f"Batch decoder: {len(test_outputs)/batch_time:.0f} words/s")
+
+    large_actual_words, large_ocr_outputs = generate_corpus(20000, 300)
+    large_model = build_log_model(*calculate_probabilities(large_actual_words[:10000], large_ocr_outputs[:10000]))
+    large_test_outputs = large_ocr_outputs[10000:]
+    matrix_words, matrix_time = measure(lambda ocr_output: viterbi_decode(ocr_output, large_model), large_test_outputs)
+    start = time.perf_counter()
+    batch_words = viterbi_decode_batch(large_test_outputs, large_model)
+    batch_time = time.perf_counter() - start
+    print(f"{len(large_model.states)} letters, identical estimations: {matrix_words == batch_words}")
+    print(f"Log-space matrix decoder: {len(large_test_outputs)/matrix_time:.0f} words/s")
+    print(f"Batch decoder: {len(large_test_outputs)/batch_time:.0f} words/s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus_paths = []
+        for data_path in ('data_actual_words.txt', 'data_ocr_outputs.txt'):
+            with open(data_path, 'rb') as f_data, open(os.path.join(directory, data_path), 'wb') as f_corpus:
+                f_corpus.write(f_data.read() * 10)
+            corpus_paths.append(os.path.join(directory, data_path))
+        corpus_size = 10 * len(actual_words)
+
+        start = time.perf_counter()
+        corpus_actual_words, corpus_ocr_outputs = read_data(*corpus_paths)
+        dictionary_model = build_log_model(*calculate_probabilities(corpus_actual_words, corpus_ocr_outputs))
+        dictionary_time = time.perf_counter() - start
+        del corpus_actual_words, corpus_ocr_outputs
+        print(f"Dictionary trainer: {corpus_size/dictionary_time:.0f} words/s")
+
+        for workers in sorted({1, os.cpu_count()}):
+            start = time.perf_counter()
+            streaming_model = train_model(*corpus_paths, workers=workers)
+            streaming_time = time.perf_counter() - start
+            identical = dictionary_model.states == streaming_model.states and all(np.array_equal(getattr(dictionary_model, table), getattr(streaming_model, table)) for table in ('log_initial', 'log_transition', 'log_emission'))
+            print(f"Streaming trainer with {workers} workers: {corpus_size/streaming_time:.0f} words/s, identical model: {identical}")
+
+if __name__ == "__main__":
+    main()
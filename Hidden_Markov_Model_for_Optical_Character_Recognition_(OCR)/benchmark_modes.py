@@ -0,0 +1,67 @@
+#Accuracy against speed of the decoding modes, usage: python benchmark_modes.py [--alphabet-size 300] [--words 20000]
+#Decodes the test words (the words after the first 50000) and the test part of a synthetic corpus with a large alphabet with exact Viterbi,
+#the sparse-transition decoder, beam search with several widths and the top-5 decoder, and prints the words per second, the corrected letters
+#metric of compare_words and the share of the words that are estimated the same as exact Viterbi. Words without any possible path (a transition or a misreading
+#that is not in the training words) have no meaningful estimation and may differ between the modes even without pruning.
+import argparse
+import random
+import time
+
+from ceng461_hw2_280201033 import build_log_model, calculate_probabilities, corrected_letters, read_data, viterbi_decode, viterbi_decode_beam, viterbi_decode_sparse, viterbi_decode_top_k
+
+def generate_corpus(word_count, alphabet_size=26, noise=0.2, successors=8, seed=0):
+    #Generates paired (actual words, OCR outputs) lists. Every letter can be followed by successors random letters, and the OCR misreads
+    #a letter with the probability noise as one of three letters that look like it. Letters after 'Z' are taken from the Unicode range 0x100 onwards.
+    generator = random.Random(seed)
+    alphabet = [chr(ord('A') + index) if index < 26 else chr(0x100 + index) for index in range(alphabet_size)]
+    next_letters = {letter: generator.sample(alphabet, min(successors, alphabet_size)) for letter in alphabet}
+    next_weights = {letter: [generator.random() for _ in next_letters[letter]] for letter in alphabet}
+    look_alikes = {letter: generator.sample(alphabet, min(3, alphabet_size)) for letter in alphabet}
+    actual_words = []
+    ocr_outputs = []
+    for _ in range(word_count):
+        word = [generator.choice(alphabet)]
+        for _ in range(generator.randint(2, 9)):
+            word.append(generator.choices(next_letters[word[-1]], next_weights[word[-1]])[0])
+        actual_words.append(''.join(word))
+        ocr_outputs.append(''.join(generator.choice(look_alikes[letter]) if generator.random() < noise else letter for letter in word))
+    return actual_words, ocr_outputs
+
+def compare_modes(name, actual_words, ocr_outputs, training_size):
+    model = build_log_model(*calculate_probabilities(actual_words[:training_size], ocr_outputs[:training_size]))
+    test_words, test_outputs = actual_words[training_size:], ocr_outputs[training_size:]
+    print(f"{name}: {len(model.states)} letters, {len(model.edge_previous)} of {len(model.states)**2} transitions are non-zero, {len(test_outputs)} test words")
+
+    modes = [("exact", lambda ocr_output: viterbi_decode(ocr_output, model)), ("sparse", lambda ocr_output: viterbi_decode_sparse(ocr_output, model))]
+    for beam_width in (1, 2, 4, 8, 16):
+        modes.append((f"beam-{beam_width}", lambda ocr_output, beam_width=beam_width: viterbi_decode_beam(ocr_output, model, beam_width)))
+    modes.append(("top-5", lambda ocr_output: viterbi_decode_top_k(ocr_output, model, 5)))
+
+    print(f"{'mode':<10}{'words/s':>10}{'corrected':>11}{'same as exact':>15}{'actual in top-k':>17}")
+    exact_words = None
+    for mode, decode in modes:
+        start = time.perf_counter()
+        estimations = [decode(ocr_output) for ocr_output in test_outputs]
+        elapsed = time.perf_counter() - start
+        in_top_k = "-"
+        if mode.startswith("top-"):
+            in_top_k = f"{sum(actual_word in [word for word, _ in top_words] for actual_word, top_words in zip(test_words, estimations))/len(test_words):.3f}"
+            estimations = [top_words[0][0] if top_words else '' for top_words in estimations]
+        exact_words = exact_words or estimations
+        same = sum(estimated_word == exact_word for estimated_word, exact_word in zip(estimations, exact_words)) / len(exact_words)
+        print(f"{mode:<10}{len(test_outputs)/elapsed:>10.0f}{corrected_letters(test_words, test_outputs, estimations):>11}{same:>15.3f}{in_top_k:>17}")
+    print()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the accuracy and the speed of the decoding modes.")
+    parser.add_argument("--alphabet-size", type=int, default=300)
+    parser.add_argument("--words", type=int, default=20000, help="size of the synthetic corpus, the first half is used for training")
+    args = parser.parse_args()
+
+    actual_words, ocr_outputs = read_data('data_actual_words.txt', 'data_ocr_outputs.txt')
+    compare_modes("data files", actual_words, ocr_outputs, 50000)
+    actual_words, ocr_outputs = generate_corpus(args.words, args.alphabet_size)
+    compare_modes("synthetic corpus", actual_words, ocr_outputs, args.words // 2)
+
+if __name__ == "__main__":
+    main()
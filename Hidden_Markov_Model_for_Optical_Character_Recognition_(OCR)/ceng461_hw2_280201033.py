@@ -1,3 +1,16 @@
+import argparse
+import collections
+import contextlib
+import itertools
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) #run_logging.py is in the parent directory, it is shared by the three projects
+from run_logging import phase_timer, record_sink
+
 def read_data(data_actual_words_path, data_ocr_outputs_path):
     with open(data_actual_words_path, 'r') as f_actual, open(data_ocr_outputs_path, 'r') as f_ocr:
         actual_words = [line.strip() for line in f_actual.readlines()]
@@ -61,74 +74,415 @@ def calculate_probabilities(actual_words, ocr_outputs):
 
     return initial_state_probabilities, transition_probabilities, emission_probabilities
 
-def viterbi_algorithm(ocr_output, initial_state_probabilities, transition_probabilities, emission_probabilities):
-    V = [{}] #Array of dictionaries that will have the form of: V[0] will be the states in first letter and the dictionary will have the letter as key and it's probability as its value
-    paths = {} #This dictionary will hold the paths that is used to reach the states. For example the path to V[3][A] will be recorded as {(3,A) : [A,B,D]}
+class log_model:
+    #Dense log-probability form of the three probability tables, built once by build_log_model and used for every decoded word.
+    def __init__(self, states, state_indices, log_initial, log_transition, observation_indices, log_emission):
+        self.states = states #Letters of the domain, the index of a letter is its row/column in the matrices
+        self.state_indices = state_indices
+        self.log_initial = log_initial #log P(X0) with the shape (K,)
+        self.log_transition = log_transition #log P(Xn|Xn-1) with the shape (K, K), indexed as [previous letter, current letter]
+        self.observation_indices = observation_indices #OCR letter to its row in log_emission, unknown letters use the last row
+        self.log_emission = log_emission #log P(En|Xn) with the shape (number of OCR letters + 1, K), the last row is all -inf
 
-    domain = initial_state_probabilities.keys()
+        #Non-zero transitions as edge lists sorted by the current letter and then the previous letter, for the sparse decoder
+        current_letters, previous_letters = np.nonzero(np.isfinite(log_transition).T)
+        self.edge_previous = previous_letters
+        self.edge_log_transition = log_transition[previous_letters, current_letters]
+        self.edge_targets, self.edge_starts = np.unique(current_letters, return_index=True) #Letters with at least one incoming edge and the first edge of each
 
-    for letter in domain:#Initializing all first states and writing them to the first elem of array
-        V[0][letter] = emission_probabilities.get((ocr_output[0],letter), 0) * initial_state_probabilities[letter]
-        paths[(0,letter)] = []
-    
-    for i in range(1,len(ocr_output)):
-        V.append({})
-        for current_letter in domain:#Calculation of V[i][letter]
-            possible_values = {} #Letter before and probability of it being the previous letter
-            for previous_letter in domain:#Calculating all possible previous letters probability
-                possible_values[previous_letter] = emission_probabilities.get((ocr_output[i], current_letter), 0) * transition_probabilities.get((current_letter, previous_letter), 0) * V[i-1].get(previous_letter, 0)
-            max_key_value_pair = ('A', 0) #Just a placeholder for finding the key with the max value
-            for key in possible_values.keys():#Finding the previous letter that has the maximum likelihood 
-                if (possible_values[key] > max_key_value_pair[1]):
-                    max_key_value_pair = (key,possible_values[key])
-            V[i][current_letter] = max_key_value_pair[1]
-            paths[(i,current_letter)] = paths[(i-1, max_key_value_pair[0])] + [max_key_value_pair[0]]
-    
-    ocr_length_minus_1 = len(ocr_output) - 1 #Created just because (len(ocr_output)-1) is used in more than 1 place
+def build_log_model(initial_state_probabilities, transition_probabilities, emission_probabilities):
+    states = list(initial_state_probabilities.keys()) #Same domain as the dictionaries, the letters that can start a word
+    state_indices = {letter: index for index, letter in enumerate(states)}
+    observations = sorted({observed_letter for observed_letter, letter in emission_probabilities.keys()})
+    observation_indices = {observed_letter: index for index, observed_letter in enumerate(observations)}
 
-    max_probability_key_value_pair = ('A', 0) #To find the maximum probability ending state
-    for letter in domain: #Finding the maximum probability ending state
-        if(V[ocr_length_minus_1][letter] > max_probability_key_value_pair[1]):
-            max_probability_key_value_pair = (letter, V[ocr_length_minus_1][letter])
-    
-    estimated_sequence = paths[(ocr_length_minus_1, max_probability_key_value_pair[0])] + [max_probability_key_value_pair[0]]
-    estimated_word = ''.join(estimated_sequence)
-    return estimated_word
+    initial = np.array([initial_state_probabilities[letter] for letter in states])
+    transition = np.zeros((len(states), len(states)))
+    for (current_letter, previous_letter), probability in transition_probabilities.items():
+        if current_letter in state_indices and previous_letter in state_indices:
+            transition[state_indices[previous_letter], state_indices[current_letter]] = probability
+    emission = np.zeros((len(observations) + 1, len(states)))
+    for (observed_letter, letter), probability in emission_probabilities.items():
+        if letter in state_indices:
+            emission[observation_indices[observed_letter], state_indices[letter]] = probability
 
+    with np.errstate(divide='ignore'): #log(0) is -inf, which is the identity of the max-plus recursion
+        return log_model(states, state_indices, np.log(initial), np.log(transition), observation_indices, np.log(emission))
 
-def compare_words(actual_words, ocr_outputs, initial_state_probabilities, transition_probabilities, emission_probabilities):
-    correct_estimations = 0
-    for actual_word, ocr_output in zip(actual_words, ocr_outputs):
+LETTER_BITS = 21 #Unicode code points are below 2**21, a letter pair (first, second) is counted with the key first << LETTER_BITS | second
+LETTER_MASK = (1 << LETTER_BITS) - 1
 
-        estimated_word = viterbi_algorithm(ocr_output, initial_state_probabilities, transition_probabilities, emission_probabilities)
+class key_counts:
+    #Counts of integer keys (letters or letter pairs) sorted by the key, with the first occurrence of every key in the corpus as (word index, position in the word).
+    #Only the keys that occur are stored, so the size grows with the letters and the letter pairs of the corpus, not with the alphabet.
+    def __init__(self, keys=None, counts=None, first_words=None, first_positions=None):
+        empty = np.zeros(0, dtype=np.int64)
+        self.keys = empty if keys is None else keys
+        self.counts = empty if counts is None else counts
+        self.first_words = empty if first_words is None else first_words
+        self.first_positions = empty if first_positions is None else first_positions
 
-        if ocr_output != estimated_word:
-            print(f"Original Word: {actual_word}, OCR Output: {ocr_output}, Estimated Word: {estimated_word}")
+    def merge(self, other):
+        #Returns the counts of both parts of the corpus, the parts can be merged in any order.
+        return count_keys(np.concatenate([self.keys, other.keys]), np.concatenate([self.first_words, other.first_words]),
+                          np.concatenate([self.first_positions, other.first_positions]), np.concatenate([self.counts, other.counts]))
+
+def count_keys(keys, words, positions, counts=None):
+    #Counts the keys that occur in the given words at the given positions, counts are the number of occurrences of every entry (1 if it is None).
+    #The earliest (word, position) of equal keys is kept as their first occurrence.
+    counts = np.ones(len(keys), dtype=np.int64) if counts is None else counts
+    order = np.lexsort((positions, words, keys))
+    keys = keys[order]
+    key_starts = np.flatnonzero(np.diff(keys, prepend=-1)) #First entry of every key, which is its earliest occurrence
+    return key_counts(keys[key_starts], np.add.reduceat(counts[order], key_starts), words[order][key_starts], positions[order][key_starts])
+
+class letter_counts:
+    #Counts of a training corpus. Letters are Unicode code points, so any UTF-8 text can be counted whatever the size of its alphabet.
+    def __init__(self):
+        self.word_count = 0
+        self.initial = key_counts() #Letters that start a word
+        self.transition = key_counts() #(previous letter, current letter) pairs
+        self.emission = key_counts() #(OCR letter, actual letter) pairs
+
+    def merge(self, other):
+        #Adds the counts of another part of the corpus, the parts can be merged in any order.
+        self.word_count += other.word_count
+        self.initial = self.initial.merge(other.initial)
+        self.transition = self.transition.merge(other.transition)
+        self.emission = self.emission.merge(other.emission)
+
+def letter_codes(words):
+    #Code points of the letters of the words back to back.
+    return np.frombuffer(''.join(words).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+
+def count_chunk(chunk):
+    #Counts a chunk of (actual word, OCR output) pairs, first_word is the index of the chunk's first word in the corpus.
+    first_word, actual_words, ocr_outputs = chunk
+    counts = letter_counts()
+    counts.word_count = len(actual_words)
+    lengths = np.array([len(actual_word) for actual_word in actual_words], dtype=np.int64)
+    letters = letter_codes(actual_words)
+    observed_letters = letter_codes(ocr_output[:len(actual_word)] for actual_word, ocr_output in zip(actual_words, ocr_outputs))
+    if len(observed_letters) != len(letters):
+        raise ValueError("An OCR output is shorter than its actual word")
+
+    words = np.repeat(first_word + np.arange(len(lengths)), lengths) #Corpus index of the word of every letter
+    positions = np.arange(len(letters)) - np.repeat(np.cumsum(lengths) - lengths, lengths) #Position of every letter in its word
+    is_initial = positions == 0
+    counts.initial = count_keys(letters[is_initial], words[is_initial], positions[is_initial])
+    transition_positions = np.flatnonzero(~is_initial) #Every letter that is not the first letter of its word has a previous letter
+    counts.transition = count_keys(letters[transition_positions - 1] << LETTER_BITS | letters[transition_positions], words[transition_positions], positions[transition_positions])
+    counts.emission = count_keys(observed_letters << LETTER_BITS | letters, words, positions)
+    return counts
+
+def iter_word_chunks(data_actual_words_path, data_ocr_outputs_path, chunk_size=20000, start=0, stop=None):
+    #Reads the paired UTF-8 files line by line from the word start up to the word stop (the end of the files if it is None) and yields
+    #(index of the first word, actual words, OCR outputs) chunks of chunk_size pairs, so only one chunk per worker is in memory.
+    with open(data_actual_words_path, 'r', encoding='utf-8') as f_actual, open(data_ocr_outputs_path, 'r', encoding='utf-8') as f_ocr:
+        pairs = itertools.islice(zip(f_actual, f_ocr), start, stop)
+        first_word = start
+        while True:
+            chunk = list(itertools.islice(pairs, chunk_size))
+            if not chunk:
+                return
+            yield first_word, [actual_line.strip() for actual_line, ocr_line in chunk], [ocr_line.strip() for actual_line, ocr_line in chunk]
+            first_word += len(chunk)
+
+def count_corpus(data_actual_words_path, data_ocr_outputs_path, word_limit=None, chunk_size=20000, workers=None):
+    #Counts the first word_limit pairs of the files (all of them if it is None) with workers processes (one per CPU if it is None) and merges the partial counts.
+    workers = workers or os.cpu_count()
+    chunks = iter_word_chunks(data_actual_words_path, data_ocr_outputs_path, chunk_size, stop=word_limit)
+    counts = letter_counts()
+    if workers == 1:
+        for chunk in chunks:
+            counts.merge(count_chunk(chunk))
+        return counts
+
+    with multiprocessing.Pool(workers) as pool:
+        pending = collections.deque() #At most two chunks per worker are read ahead, Pool.imap would read the whole file into its task queue
+        for chunk in chunks:
+            pending.append(pool.apply_async(count_chunk, (chunk,)))
+            if len(pending) >= 2 * workers:
+                counts.merge(pending.popleft().get())
+        while pending:
+            counts.merge(pending.popleft().get())
+    return counts
+
+def probability_tables(counts):
+    #Returns the three dictionaries of calculate_probabilities for the counted words, with the keys in the same order (the order they first occur in the corpus).
+    def in_corpus_order(table):
+        order = np.lexsort((table.first_positions, table.first_words))
+        return list(zip(table.keys[order].tolist(), table.counts[order].tolist()))
+
+    initial_state_probabilities = {chr(letter): count/counts.word_count for letter, count in in_corpus_order(counts.initial)}
+
+    transitions = in_corpus_order(counts.transition)
+    conditioned_letter_count_in_transitions = collections.Counter() #Transitions from the previous letter to any letter
+    for key, count in transitions:
+        conditioned_letter_count_in_transitions[key >> LETTER_BITS] += count
+    transition_probabilities = {(chr(key & LETTER_MASK), chr(key >> LETTER_BITS)): count/conditioned_letter_count_in_transitions[key >> LETTER_BITS] for key, count in transitions}
+
+    emissions = in_corpus_order(counts.emission)
+    conditioned_letter_count_in_emissions = collections.Counter() #Occurrences of the actual letter
+    for key, count in emissions:
+        conditioned_letter_count_in_emissions[key & LETTER_MASK] += count
+    emission_probabilities = {(chr(key >> LETTER_BITS), chr(key & LETTER_MASK)): count/conditioned_letter_count_in_emissions[key & LETTER_MASK] for key, count in emissions}
+
+    return initial_state_probabilities, transition_probabilities, emission_probabilities
+
+def build_log_model_from_counts(counts):
+    #Same model as build_log_model(*calculate_probabilities(...)) on the same words. The dictionaries only have the letters and the pairs that occur,
+    #so building them costs little next to counting the corpus.
+    return build_log_model(*probability_tables(counts))
+
+def train_model(data_actual_words_path, data_ocr_outputs_path, word_limit=None, chunk_size=20000, workers=None):
+    #Streaming, parallel replacement of read_data + calculate_probabilities + build_log_model, the memory does not grow with the corpus.
+    return build_log_model_from_counts(count_corpus(data_actual_words_path, data_ocr_outputs_path, word_limit, chunk_size, workers))
+
+def save_model(path, model):
+    #Saves the three log-probability tables and the letters of their rows/columns as an .npz file.
+    observations = sorted(model.observation_indices, key=model.observation_indices.get)
+    np.savez(path, states=np.array(model.states), log_initial=model.log_initial, log_transition=model.log_transition, observations=np.array(observations), log_emission=model.log_emission)
+
+def load_model(path):
+    with np.load(path) as data:
+        states = data['states'].tolist()
+        observations = data['observations'].tolist()
+        return log_model(states, {letter: index for index, letter in enumerate(states)}, data['log_initial'], data['log_transition'],
+                         {observed_letter: index for index, observed_letter in enumerate(observations)}, data['log_emission'])
+
+def observation_rows(ocr_output, model):
+    #Rows of log_emission for the letters of an OCR output, the letters that are not in the training words use the last row.
+    unknown_observation = len(model.observation_indices)
+    return [model.observation_indices.get(observed_letter, unknown_observation) for observed_letter in ocr_output]
+
+def best_path_word(scores, backpointers, model):
+    #Follows the backpointers from the most probable last letter, backpointers[i][k] is the previous letter of the best path that ends with the letter k at i.
+    estimated_sequence = [int(np.argmax(scores))]
+    for i in range(len(backpointers) - 1, 0, -1):
+        estimated_sequence.append(int(backpointers[i][estimated_sequence[-1]]))
+    return ''.join(model.states[index] for index in reversed(estimated_sequence))
 
+def viterbi_decode(ocr_output, model):
+    #Log-space Viterbi: sums of log-probabilities do not underflow on long words like products of probabilities do.
+    observations = observation_rows(ocr_output, model)
+    state_range = np.arange(len(model.states))
+
+    scores = model.log_initial + model.log_emission[observations[0]] #scores[k] is the log-probability of the best path that ends with the letter k
+    backpointers = np.empty((len(observations), len(model.states)), dtype=np.intp) #backpointers[i][k] is the previous letter of the best path that ends with the letter k at i
+    for i in range(1, len(observations)):
+        candidates = scores[:, np.newaxis] + model.log_transition #candidates[j][k] is the score of reaching the letter k from the letter j, the max-plus step for all letters at once
+        backpointers[i] = np.argmax(candidates, axis=0) #argmax takes the first maximum, same as the strict comparison in the domain order
+        scores = candidates[backpointers[i], state_range] + model.log_emission[observations[i]]
+
+    return best_path_word(scores, backpointers, model)
+
+def viterbi_decode_batch(ocr_outputs, model, element_budget=2**22):
+    #Decodes many words at once. Words of the same length are decoded together: the recursion of viterbi_decode runs on a (words, K, K) score tensor,
+    #so the per-position cost is paid once per group instead of once per word. element_budget bounds the elements of that tensor, so the words in a batch
+    #shrink as the alphabet grows (2**22 floats are 32 MB, about 6000 words of 26 letters but only 46 words of 300 letters).
+    #Returns the estimated words in the order of ocr_outputs.
+    state_letters = np.array(model.states)
+    incoming_log_transition = np.ascontiguousarray(model.log_transition.T) #[current letter, previous letter], so the max runs over the contiguous last axis
+    estimated_words = [''] * len(ocr_outputs)
+    batch_size = max(1, element_budget // len(model.states)**2)
+
+    words_by_length = {} #Length to the positions of the words with that length
+    for position, ocr_output in enumerate(ocr_outputs):
+        words_by_length.setdefault(len(ocr_output), []).append(position)
+
+    for length, positions in words_by_length.items():
+        if length == 0:
+            continue
+        for batch_start in range(0, len(positions), batch_size):
+            batch_positions = positions[batch_start:batch_start + batch_size]
+            observations = np.array([observation_rows(ocr_outputs[position], model) for position in batch_positions])
+            word_range = np.arange(len(batch_positions))
+
+            scores = model.log_initial + model.log_emission[observations[:, 0]] #scores[b][k] is the best path of the word b that ends with the letter k
+            backpointers = np.empty((length, len(batch_positions), len(model.states)), dtype=np.intp)
+            for i in range(1, length):
+                candidates = scores[:, np.newaxis, :] + incoming_log_transition #candidates[b][k][j] is the score of reaching the letter k from the letter j in the word b
+                backpointers[i] = np.argmax(candidates, axis=2)
+                scores = np.take_along_axis(candidates, backpointers[i][:, :, np.newaxis], axis=2)[:, :, 0] + model.log_emission[observations[:, i]]
+
+            estimated_sequences = np.empty((len(batch_positions), length), dtype=np.intp) #Following the backpointers of all the words at once
+            estimated_sequences[:, length - 1] = np.argmax(scores, axis=1)
+            for i in range(length - 1, 0, -1):
+                estimated_sequences[:, i - 1] = backpointers[i][word_range, estimated_sequences[:, i]]
+            for position, estimated_sequence in zip(batch_positions, state_letters[estimated_sequences]):
+                estimated_words[position] = ''.join(estimated_sequence)
+    return estimated_words
+
+def viterbi_decode_sparse(ocr_output, model):
+    #Same estimation as viterbi_decode, but every step only visits the non-zero transitions: O(edges) instead of O(K^2) per letter.
+    observations = observation_rows(ocr_output, model)
+    edge_counts = np.diff(np.append(model.edge_starts, len(model.edge_previous)))
+
+    scores = model.log_initial + model.log_emission[observations[0]]
+    backpointers = np.zeros((len(observations), len(model.states)), dtype=np.intp) #Letters without a reachable previous letter point to the first letter, as argmax does
+    for i in range(1, len(observations)):
+        edge_scores = scores[model.edge_previous] + model.edge_log_transition
+        best_scores = np.maximum.reduceat(edge_scores, model.edge_starts) if len(edge_scores) else np.empty(0)
+        is_best = (edge_scores == np.repeat(best_scores, edge_counts)) & np.repeat(best_scores > -np.inf, edge_counts)
+        best_edges = np.flatnonzero(is_best)
+        targets, first_best = np.unique(np.repeat(np.arange(len(model.edge_targets)), edge_counts)[best_edges], return_index=True) #The first best edge has the smallest previous letter, same as argmax
+        backpointers[i][model.edge_targets[targets]] = model.edge_previous[best_edges[first_best]]
+        scores = np.full(len(model.states), -np.inf)
+        scores[model.edge_targets] = best_scores
+        scores += model.log_emission[observations[i]]
+
+    return best_path_word(scores, backpointers, model)
+
+def viterbi_decode_beam(ocr_output, model, beam_width=8):
+    #Approximate Viterbi that keeps only the beam_width best letters at every position: O(beam_width * K) instead of O(K^2) per letter.
+    #The estimation is the same as viterbi_decode whenever the best path never leaves the beam.
+    if beam_width < 1:
+        raise ValueError("beam_width must be at least 1")
+    observations = observation_rows(ocr_output, model)
+
+    scores = model.log_initial + model.log_emission[observations[0]]
+    backpointers = np.empty((len(observations), len(model.states)), dtype=np.intp)
+    for i in range(1, len(observations)):
+        beam = np.arange(len(model.states)) if beam_width >= len(model.states) else np.sort(np.argpartition(-scores, beam_width - 1)[:beam_width]) #Sorted, so ties go to the first letter
+        candidates = scores[beam, np.newaxis] + model.log_transition[beam] #candidates[b][k] is the score of reaching the letter k from the b-th letter of the beam
+        best_in_beam = np.argmax(candidates, axis=0)
+        backpointers[i] = beam[best_in_beam]
+        scores = candidates[best_in_beam, np.arange(len(model.states))] + model.log_emission[observations[i]]
+
+    return best_path_word(scores, backpointers, model)
+
+def viterbi_decode_top_k(ocr_output, model, k=5):
+    #N-best (list) Viterbi: keeps the k best paths that end with every letter and returns the k most probable words as (word, log-probability) pairs,
+    #the best first. The first word is the estimation of viterbi_decode. Fewer than k words are returned if fewer paths are possible.
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    observations = observation_rows(ocr_output, model)
+    letter_count = len(model.states)
+
+    scores = np.full((letter_count, k), -np.inf) #scores[j][r] is the r-th best path that ends with the letter j
+    scores[:, 0] = model.log_initial + model.log_emission[observations[0]]
+    backpointers = np.empty((len(observations), k, letter_count), dtype=np.intp) #backpointers[i][r][j] is the flat index (previous letter * k + rank) of that path
+    for i in range(1, len(observations)):
+        live_paths = np.flatnonzero(scores.ravel() > -np.inf) #Only the possible paths are extended, in the order of their flat index
+        if len(live_paths) == 0:
+            return []
+        candidates = scores.ravel()[live_paths, np.newaxis] + model.log_transition[live_paths // k] #candidates[p][j] is the score of extending the p-th live path with the letter j
+        for rank in range(k): #k argmax passes are cheaper than sorting the candidates of every letter, and ties go to the first previous letter
+            best_paths = np.argmax(candidates, axis=0)
+            backpointers[i][rank] = live_paths[best_paths]
+            scores[:, rank] = candidates[best_paths, np.arange(letter_count)]
+            candidates[best_paths, np.arange(letter_count)] = -np.inf
+        scores += model.log_emission[observations[i]][:, np.newaxis]
+
+    final_paths = np.argsort(-scores.ravel(), kind='stable')[:k]
+    estimated_words = []
+    for final_path in final_paths:
+        if scores.ravel()[final_path] == -np.inf:
+            break
+        letter, rank = divmod(int(final_path), k)
+        estimated_sequence = [letter]
+        for i in range(len(observations) - 1, 0, -1):
+            letter, rank = divmod(int(backpointers[i][rank][letter]), k)
+            estimated_sequence.append(letter)
+        estimated_words.append((''.join(model.states[index] for index in reversed(estimated_sequence)), float(scores.ravel()[final_path])))
+    return estimated_words
+
+def corrected_letters(actual_words, ocr_outputs, estimated_words):
+    #Number of the letters where the OCR output is wrong but the estimation is correct.
+    correct_estimations = 0
+    for actual_word, ocr_output, estimated_word in zip(actual_words, ocr_outputs, estimated_words):
         for a,o,e in zip(actual_word, ocr_output, estimated_word):
             if (a != o) and (a == e):
                 correct_estimations += 1
-    print(f"Number of corrected letters where OCR output is wrong but estimation is correct: {correct_estimations}")
+    return correct_estimations
+
+def viterbi_algorithm(ocr_output, initial_state_probabilities, transition_probabilities, emission_probabilities):
+    #Decodes a single word from the probability dictionaries. Build the model once with build_log_model and use viterbi_decode to decode many words.
+    return viterbi_decode(ocr_output, build_log_model(initial_state_probabilities, transition_probabilities, emission_probabilities))
+
+
+def compare_words(actual_words, ocr_outputs, initial_state_probabilities, transition_probabilities, emission_probabilities):
+    model = build_log_model(initial_state_probabilities, transition_probabilities, emission_probabilities) #Built once for all the words
+    estimated_words = viterbi_decode_batch(ocr_outputs, model)
+    for actual_word, ocr_output, estimated_word in zip(actual_words, ocr_outputs, estimated_words):
+        if ocr_output != estimated_word:
+            print(f"Original Word: {actual_word}, OCR Output: {ocr_output}, Estimated Word: {estimated_word}")
+    print(f"Number of corrected letters where OCR output is wrong but estimation is correct: {corrected_letters(actual_words, ocr_outputs, estimated_words)}")
 
 
+LOG_FIELDS = ['event', 'phase', 'seconds', 'actual', 'ocr', 'estimated', 'words', 'corrected_letters'] #The CSV columns of the --log file
+
 def main():
-    actual_words, ocr_outputs = read_data('data_actual_words.txt', 'data_ocr_outputs.txt')
+    parser = argparse.ArgumentParser(description="Trains the OCR HMM on the first words and corrects the OCR outputs of the rest with Viterbi.")
+    parser.add_argument("--training-words", type=int, default=50000, help="number of the words that the model is trained on, the rest are decoded")
+    parser.add_argument("--model", help="load the model from this .npz file instead of training it, the probability tables are not printed")
+    parser.add_argument("--save-model", help="save the trained model to this .npz file")
+    parser.add_argument("--quiet", action="store_true", help="print only the number of the corrected letters, not the probability tables and the estimated words")
+    parser.add_argument("--log", help="write the changed estimations, a summary and the duration of every phase to this file as JSON lines, or as CSV if it ends with .csv")
+    parser.add_argument("--log-every", type=int, default=0, help="write the --log buffer after this many records instead of once at the end")
+    parser.add_argument("--timings", action="store_true", help="print the duration of every phase (load, train, decode, write) to stderr at the end")
+    args = parser.parse_args()
 
-    initial_state_probabilities, transition_probabilities, emission_probabilities = calculate_probabilities(actual_words[:50000], ocr_outputs[:50000])
-    print('Initial State Probabilities:')
-    for key in initial_state_probabilities.keys():
-        print(key,initial_state_probabilities[key])
+    with contextlib.ExitStack() as stack:
+        log = stack.enter_context(record_sink(args.log, LOG_FIELDS, args.log_every)) if args.log else None
+        timer = phase_timer([lambda phase, seconds: log.write(event='phase', phase=phase, seconds=seconds)] if log is not None else [])
 
-    print('Transition Probabilities:')
-    for key in transition_probabilities.keys():
-        print(key,transition_probabilities[key])
-    
-    print('Emission Probabilities:')
-    for key in emission_probabilities.keys():
-        print(key,emission_probabilities[key])
+        with timer.phase('train'):
+            if args.model:
+                model = load_model(args.model)
+            else:
+                counts = count_corpus('data_actual_words.txt', 'data_ocr_outputs.txt', args.training_words) #Streamed, the training words are never all in memory
+                initial_state_probabilities, transition_probabilities, emission_probabilities = probability_tables(counts)
+                model = build_log_model(initial_state_probabilities, transition_probabilities, emission_probabilities) #Built once for all the words
+            if args.save_model:
+                save_model(args.save_model, model)
+
+        with timer.phase('write'):
+            if not args.quiet and not args.model:
+                print('Initial State Probabilities:')
+                for key in initial_state_probabilities.keys():
+                    print(key,initial_state_probabilities[key])
+
+                print('Transition Probabilities:')
+                for key in transition_probabilities.keys():
+                    print(key,transition_probabilities[key])
+
+                print('Emission Probabilities:')
+                for key in emission_probabilities.keys():
+                    print(key,emission_probabilities[key])
+
+        #The test words are read, decoded and written one chunk at a time
+        test_chunks = iter_word_chunks('data_actual_words.txt', 'data_ocr_outputs.txt', start=args.training_words)
+        test_word_count = 0
+        correct_estimations = 0
+        while True:
+            with timer.phase('load'):
+                chunk = next(test_chunks, None)
+            if chunk is None:
+                break
+            _, test_words, test_outputs = chunk
+            with timer.phase('decode'):
+                estimated_words = viterbi_decode_batch(test_outputs, model)
+
+            with timer.phase('write'):
+                for actual_word, ocr_output, estimated_word in zip(test_words, test_outputs, estimated_words):
+                    if ocr_output != estimated_word:
+                        if not args.quiet:
+                            print(f"Original Word: {actual_word}, OCR Output: {ocr_output}, Estimated Word: {estimated_word}")
+                        if log is not None:
+                            log.write(event='estimation', actual=actual_word, ocr=ocr_output, estimated=estimated_word)
+                test_word_count += len(test_outputs)
+                correct_estimations += corrected_letters(test_words, test_outputs, estimated_words)
 
+        with timer.phase('write'):
+            print(f"Number of corrected letters where OCR output is wrong but estimation is correct: {correct_estimations}")
+            if log is not None:
+                log.write(event='summary', words=test_word_count, corrected_letters=correct_estimations)
 
-    compare_words(actual_words[50000:], ocr_outputs[50000:], initial_state_probabilities, transition_probabilities, emission_probabilities)
+        if args.timings:
+            for phase, seconds in timer.durations.items():
+                print(f"{phase}: {seconds:.3f} s", file=sys.stderr)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
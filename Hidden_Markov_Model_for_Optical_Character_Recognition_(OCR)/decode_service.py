@@ -0,0 +1,160 @@
+#Long-running OCR correction service, usage: python decode_service.py [--model model.npz] [--cache-size 100000] [--port 8461 [--host 127.0.0.1]]
+#Keeps the model resident and answers the estimated word for every line with an OCR output, from stdin to stdout or, with --port, over a local TCP socket.
+#The line "!stats" is answered with the cache and latency counters as JSON. If the --model file does not exist, the model is trained on the first 50000 words
+#of the data files and saved to it, so the next start only loads it.
+import argparse
+import asyncio
+import collections
+import json
+import os
+import sys
+import time
+
+from ceng461_hw2_280201033 import load_model, save_model, train_model, viterbi_decode_batch
+
+STATS_COMMAND = '!stats'
+
+class decode_cache:
+    #Bounded LRU cache from the OCR output to its estimated word, the least recently used word is evicted when it is full.
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, ocr_output):
+        estimated_word = self.entries.get(ocr_output)
+        if estimated_word is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(ocr_output)
+        return estimated_word
+
+    def put(self, ocr_output, estimated_word):
+        if self.capacity <= 0:
+            return
+        self.entries[ocr_output] = estimated_word
+        self.entries.move_to_end(ocr_output)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+class decoder_service:
+    #The resident model with its cache and counters, decode is called with the words of one request.
+    def __init__(self, model, cache_size=100000):
+        self.model = model
+        self.cache = decode_cache(cache_size)
+        self.requests = 0
+        self.words = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def decode(self, ocr_outputs):
+        start = time.perf_counter()
+        estimated_words = {} #Estimated word of every distinct word of the request
+        missed_outputs = []
+        for ocr_output in ocr_outputs:
+            if ocr_output in estimated_words:
+                self.cache.hits += 1 #A word repeated in the request is looked up and decoded once, its repeats are answered like cached words
+                continue
+            estimated_words[ocr_output] = self.cache.get(ocr_output)
+            if estimated_words[ocr_output] is None:
+                missed_outputs.append(ocr_output)
+        if missed_outputs:
+            for ocr_output, estimated_word in zip(missed_outputs, viterbi_decode_batch(missed_outputs, self.model)):
+                estimated_words[ocr_output] = estimated_word
+                self.cache.put(ocr_output, estimated_word)
+
+        latency = time.perf_counter() - start
+        self.requests += 1
+        self.words += len(ocr_outputs)
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        return [estimated_words[ocr_output] for ocr_output in ocr_outputs]
+
+    def stats(self):
+        lookups = self.cache.hits + self.cache.misses
+        return {
+            'requests': self.requests,
+            'words': self.words,
+            'cache_entries': len(self.cache.entries),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'hit_rate': self.cache.hits / lookups if lookups else 0.0,
+            'mean_latency_ms': 1000 * self.total_latency / self.requests if self.requests else 0.0,
+            'max_latency_ms': 1000 * self.max_latency,
+        }
+
+    def answer(self, lines):
+        #Answers a block of request lines, the words between two "!stats" lines are decoded as one request.
+        answers = []
+        ocr_outputs = []
+        for line in lines:
+            if line == STATS_COMMAND:
+                if ocr_outputs:
+                    answers.extend(self.decode(ocr_outputs))
+                    ocr_outputs = []
+                answers.append(json.dumps(self.stats()))
+            else:
+                ocr_outputs.append(line)
+        if ocr_outputs:
+            answers.extend(self.decode(ocr_outputs))
+        return answers
+
+async def serve_stdin(service, block_size=65536):
+    #Answers the lines of stdin as they arrive. read1 returns as soon as some data is waiting, at most block_size bytes, so a single line is answered
+    #immediately and only the complete lines that are already waiting are decoded together as one request.
+    loop = asyncio.get_running_loop()
+    partial_line = b'' #The end of the data that is not a complete line yet
+    while True:
+        data = await loop.run_in_executor(None, sys.stdin.buffer.read1, block_size)
+        if not data:
+            lines = [partial_line] if partial_line else [] #The last line may have no newline
+        else:
+            *lines, partial_line = (partial_line + data).split(b'\n')
+        if lines:
+            sys.stdout.write(''.join(answer + '\n' for answer in service.answer([line.decode().strip() for line in lines])))
+            sys.stdout.flush()
+        if not data:
+            return
+
+async def serve_socket(service, host, port):
+    #Every line of a connection is a request, connections share the model and the cache.
+    async def handle_connection(reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                writer.write(''.join(answer + '\n' for answer in service.answer([line.decode().strip()])).encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle_connection, host, port)
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves OCR corrections from a resident HMM.")
+    parser.add_argument("--model", help="model file (.npz), trained and saved if it does not exist")
+    parser.add_argument("--cache-size", type=int, default=100000, help="number of the memoized OCR outputs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="serve over a TCP socket instead of stdin/stdout")
+    args = parser.parse_args()
+
+    if args.model and os.path.exists(args.model):
+        model = load_model(args.model)
+    else:
+        model = train_model('data_actual_words.txt', 'data_ocr_outputs.txt', word_limit=50000)
+        if args.model:
+            save_model(args.model, model)
+
+    service = decoder_service(model, args.cache_size)
+    if args.port is None:
+        asyncio.run(serve_stdin(service))
+    else:
+        asyncio.run(serve_socket(service, args.host, args.port))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#Scaling benchmark of value iteration, usage: python benchmark.py [--reference-sizes 25 50 100] [--sizes 100 1000 10000 100000]
+#Solves the fisherman MDP with the original loops, kept here as a reference, for the small stocks and checks that the vectorized solver with the original signed sum test finds the same
+#utilities and policies. Then prints the iterations and the seconds of the vectorized solver for every stock size.
+import argparse
+import random
+import time
+
+import numpy as np
+
+from ceng461_hw3_280201033 import discount_factor, growth_rates, probabilities, value_iteration
+
+def reference_value_iteration(M, discount_factor, growth_rates, probabilities):
+    utilities = [0] * (M+1)
+    policies = [0] * (M+1)
+    converged = False
+    iteration = 0
+    while not converged:
+        iteration += 1
+        next_utilities = [0] * (M+1)
+        next_optimal_policies = [0] * (M+1)
+        for state in range(M+1):
+            max_utility = 0
+            optimal_policy = 0
+            for hunted_fish_count in range(state+1):
+                expected_utility = 0
+                for i in range(len(growth_rates)):
+                    next_state = min(M, int(0.5 + (state - hunted_fish_count) * growth_rates[i]))
+                    expected_utility += probabilities[i] * utilities[next_state]
+                utility = hunted_fish_count + discount_factor * expected_utility
+                if utility > max_utility:
+                    max_utility = utility
+                    optimal_policy = hunted_fish_count
+            next_utilities[state] = max_utility
+            next_optimal_policies[state] = optimal_policy
+
+        total_difference = 0
+        for i in range(M+1):
+            total_difference += next_utilities[i] - utilities[i]
+        if (total_difference < (10**-6)):
+            converged = True
+        utilities = next_utilities
+        policies = next_optimal_policies
+    return utilities, policies, iteration
+
+def generate_mdp(M, growth_rate_count=4, discount_factor=0.9, lowest_rate=1.0, highest_rate=2.0, seed=0):
+    #Generates a fisherman MDP with the stock M and growth_rate_count random growth rates between lowest_rate and highest_rate with random probabilities.
+    #Returns the arguments of the solvers: M, discount_factor, growth_rates, probabilities.
+    generator = random.Random(seed)
+    growth_rates = sorted(generator.uniform(lowest_rate, highest_rate) for _ in range(growth_rate_count))
+    weights = [generator.random() for _ in range(growth_rate_count)]
+    return M, discount_factor, growth_rates, [weight / sum(weights) for weight in weights]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the scaling of the vectorized value iteration.")
+    parser.add_argument("--reference-sizes", type=int, nargs="*", default=[25, 50, 100])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'M':>7}{'solver':>12}{'iterations':>12}{'seconds':>10}{'same':>6}")
+    for M in args.reference_sizes:
+        start = time.perf_counter()
+        reference_utilities, reference_policies, reference_iterations = reference_value_iteration(M, discount_factor, growth_rates, probabilities)
+        reference_time = time.perf_counter() - start
+        start = time.perf_counter()
+        utilities, policies, iterations = value_iteration(M, discount_factor, growth_rates, probabilities, signed_sum_test=True)
+        vectorized_time = time.perf_counter() - start
+        same = np.array_equal(utilities, reference_utilities) and np.array_equal(policies, reference_policies) and iterations == reference_iterations
+        print(f"{M:>7}{'reference':>12}{reference_iterations:>12}{reference_time:>10.3f}")
+        print(f"{M:>7}{'vectorized':>12}{iterations:>12}{vectorized_time:>10.3f}{str(same):>6}")
+
+    for M in args.sizes:
+        start = time.perf_counter()
+        utilities, policies, iterations = value_iteration(M, discount_factor, growth_rates, probabilities)
+        print(f"{M:>7}{'vectorized':>12}{iterations:>12}{time.perf_counter() - start:>10.3f}")
+
+if __name__ == "__main__":
+    main()
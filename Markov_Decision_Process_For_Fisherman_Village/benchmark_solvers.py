@@ -0,0 +1,37 @@
+#Comparison of the MDP solvers, usage: python benchmark_solvers.py [--sizes 100 1000] [--discount-factors 0.9 0.95 0.99] [--solvers value-iteration ...]
+#Solves the fisherman MDP with every solver for every stock size and discount factor, and prints the iterations, the seconds, the max-norm error of the
+#utilities against a value iteration run to a residual of 1e-11, and whether the policies are the same. The Gauss-Seidel solver loops over the states in
+#Python and its sweeps are O(M^2), so it is only meant for small stocks.
+import argparse
+import time
+
+import numpy as np
+
+from ceng461_hw3_280201033 import gauss_seidel_value_iteration, growth_rates, modified_policy_iteration, probabilities, value_iteration
+
+SOLVERS = {
+    "value-iteration": value_iteration,
+    "modified-policy": modified_policy_iteration,
+    "gauss-seidel": gauss_seidel_value_iteration,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the iterations and the time of the MDP solvers.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--discount-factors", type=float, nargs="+", default=[0.9, 0.95, 0.99])
+    parser.add_argument("--solvers", nargs="+", choices=list(SOLVERS), default=list(SOLVERS))
+    args = parser.parse_args()
+
+    print(f"{'M':>7}{'discount':>10}{'solver':>17}{'iterations':>12}{'seconds':>10}{'error':>10}{'same policy':>13}")
+    for M in args.sizes:
+        for discount_factor in args.discount_factors:
+            exact_utilities, exact_policies, _ = value_iteration(M, discount_factor, growth_rates, probabilities, tolerance=10**-11)
+            for name in args.solvers:
+                start = time.perf_counter()
+                utilities, policies, iterations = SOLVERS[name](M, discount_factor, growth_rates, probabilities)
+                elapsed = time.perf_counter() - start
+                error = np.max(np.abs(utilities - exact_utilities))
+                print(f"{M:>7}{discount_factor:>10}{name:>17}{iterations:>12}{elapsed:>10.3f}{error:>10.1e}{str(np.array_equal(policies, exact_policies)):>13}")
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,13 @@
+import argparse
+import contextlib
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) #run_logging.py is in the parent directory, it is shared by the three projects
+from run_logging import phase_timer, record_sink
+
 M = 100
 discount_factor = 0.9
 
@@ -6,49 +16,172 @@ probabilities = [0.2, 0.3, 0.3, 0.2]
 
 ########## Value iteration algorithm ##########
 
-utilities = [0] * (M+1) #Utilities and policies of states are stored in two arrays. 
-policies = [0] * (M+1)  #For example utility of state 1 is utilities[1] and policy of state 1 is to catch policies[1] number of fish. 
-
-converged = False #A flag to stop while loop when the difference between utilities are small enough
-iteration = 0
-while not converged:
-    iteration += 1 #Iteration counter just for printing purposes
-    next_utilities = [0] * (M+1)
-    next_optimal_policies = [0] * (M+1)
-    for state in range(M+1):
-        max_utility = 0
-        optimal_policy = 0
-        for hunted_fish_count in range(state+1):
-            expected_utility = 0
-            for i in range(len(growth_rates)):
-                next_state = min(M, int(0.5 + (state - hunted_fish_count) * growth_rates[i])) #int(0.5+x) is used to round the float numbers to the closest integer. 
-                expected_utility += probabilities[i] * utilities[next_state]                  #Tried round() but it wasn't rounding 2.5 to 3.Instead it was rounding it down to 2.
-            utility = hunted_fish_count + discount_factor * expected_utility
-            if utility > max_utility:
-                max_utility = utility
-                optimal_policy = hunted_fish_count
-        
-        next_utilities[state] = max_utility
-        next_optimal_policies[state] = optimal_policy
-    
-    #Checking if the utilities are converged
-    total_difference = 0
-    for i in range(M+1):
-        total_difference += next_utilities[i] - utilities[i]
-    if (total_difference < (10**-6)):
-        converged = True
-    
-    #Updating utilities and policies 
-    utilities = next_utilities 
-    policies = next_optimal_policies
-
-    print(f"ITERATION {iteration}")
-    for i in range(M+1):
-        print(f"\tSTATE {i}:")
-        print(f"\t\tUtility of state {i} after iteration {iteration}: {utilities[i]}")
-        print(f"\t\tOptimal policy of state {i} after iteration {iteration}: Catch {policies[i]} fish")
-
-
-print("OPTIMAL POLICIES FOR EACH STATE:")
-for i in range(M+1):
-    print(f"\t State {i}: Catch {policies[i]} fish")
\ No newline at end of file
+def transition_structure(M, growth_rates):
+    #The next state only depends on the number of fish left after hunting, so it is computed once for every left fish count and growth rate.
+    #next_states[i][r] is the next state when r fish are left and the fish grow with growth_rates[i].
+    left_fish_counts = np.arange(M+1)
+    return np.minimum(M, (0.5 + np.outer(growth_rates, left_fish_counts)).astype(np.int64)) #0.5+x truncated to an integer rounds to the closest integer, 2.5 is rounded to 3
+
+def expected_next_utilities(utilities, next_states, probabilities):
+    #expected_utilities[r] is the expected utility of the next state when r fish are left.
+    expected_utilities = np.zeros(len(utilities))
+    for probability, next_state in zip(probabilities, next_states):
+        expected_utilities += probability * utilities[next_state]
+    return expected_utilities
+
+def bellman_backup(utilities, next_states, probabilities, discount_factor):
+    #Utility of catching h fish in the state s is h + discount_factor * expected_utilities[s-h], which is s + (discount_factor * expected_utilities[r] - r) for r = s-h fish left.
+    #So the best catch of every state is found with a running maximum over r = 0..s instead of trying every h, O(M) instead of O(M^2) per iteration.
+    expected_utilities = expected_next_utilities(utilities, next_states, probabilities)
+    left_fish_counts = np.arange(len(utilities))
+    values = discount_factor * expected_utilities - left_fish_counts
+    is_best_so_far = values >= np.maximum.accumulate(values)
+    best_left_fish_counts = np.maximum.accumulate(np.where(is_best_so_far, left_fish_counts, 0)) #The last best r is the first best h, same as the strict comparison over h = 0..s
+    policies = left_fish_counts - best_left_fish_counts
+    return policies + discount_factor * expected_utilities[best_left_fish_counts], policies
+
+def bellman_residual(next_utilities, utilities):
+    #Max-norm of the change of the utilities. The signed sum of the changes can be small while single states are still far from converged.
+    return float(np.max(np.abs(next_utilities - utilities)))
+
+def iter_value_iteration(M, discount_factor, growth_rates, probabilities, tolerance=10**-6, signed_sum_test=False):
+    #Yields the utilities and the policies of the states after every iteration, stops after the iteration where the Bellman residual is below tolerance.
+    #signed_sum_test uses the original test of the homework instead, the signed sum of the changes, to reproduce its iterations.
+    next_states = transition_structure(M, growth_rates)
+    utilities = np.zeros(M+1)
+    while True:
+        next_utilities, policies = bellman_backup(utilities, next_states, probabilities, discount_factor)
+        if signed_sum_test:
+            difference = np.cumsum(next_utilities - utilities)[-1] #Summed in the state order like the original loop, np.sum would sum pairwise
+        else:
+            difference = bellman_residual(next_utilities, utilities)
+        utilities = next_utilities
+        yield utilities, policies
+        if difference < tolerance:
+            return
+
+def value_iteration(M, discount_factor, growth_rates, probabilities, tolerance=10**-6, signed_sum_test=False):
+    #Returns the converged utilities and policies of the states 0..M and the number of the iterations.
+    iteration = 0
+    for iteration, (utilities, policies) in enumerate(iter_value_iteration(M, discount_factor, growth_rates, probabilities, tolerance, signed_sum_test), start=1):
+        pass
+    return utilities, policies, iteration
+
+########## Other solvers ##########
+#Every solver returns the utilities and the policies of the states 0..M and its number of iterations, and stops when the Bellman residual is below tolerance.
+
+def modified_policy_iteration(M, discount_factor, growth_rates, probabilities, tolerance=10**-6, evaluation_sweeps=20):
+    #Improves the policy greedily, then evaluates it approximately with evaluation_sweeps sweeps of the fixed-policy backup, which has no maximization.
+    #An iteration is one improvement.
+    next_states = transition_structure(M, growth_rates)
+    left_fish_counts = np.arange(M+1)
+    utilities = np.zeros(M+1)
+    iteration = 0
+    while True:
+        iteration += 1
+        next_utilities, policies = bellman_backup(utilities, next_states, probabilities, discount_factor)
+        residual = bellman_residual(next_utilities, utilities)
+        utilities = next_utilities
+        if residual < tolerance:
+            return utilities, policies, iteration
+        left_after_policy = left_fish_counts - policies
+        for _ in range(evaluation_sweeps):
+            utilities = policies + discount_factor * expected_next_utilities(utilities, next_states, probabilities)[left_after_policy]
+
+def gauss_seidel_value_iteration(M, discount_factor, growth_rates, probabilities, tolerance=10**-6):
+    #Updates the states in place in the state order, so a backup already uses the new utilities of the states before it. An iteration is one sweep.
+    #The expected utilities are kept up to date incrementally: a change of the state s only changes expected_utilities[r] for the r that can grow into s.
+    #The best catch of every state is still searched over all of its r, because an in-place change can lower the running maximum, so a sweep is O(M^2).
+    #It is a reference for small stocks to compare the iterations with, not a replacement of value_iteration, and it is not one of the command line solvers.
+    next_states = transition_structure(M, growth_rates)
+    predecessor_order = np.argsort(next_states.ravel(), kind='stable')
+    predecessor_left_counts = (predecessor_order % (M+1)).tolist() #r of every (r, growth rate) pair, grouped by the next state
+    predecessor_probabilities = np.repeat(probabilities, M+1)[predecessor_order].tolist()
+    predecessor_starts = np.searchsorted(next_states.ravel()[predecessor_order], np.arange(M+2)).tolist()
+
+    left_fish_counts = np.arange(M+1)
+    utilities = np.zeros(M+1)
+    policies = np.zeros(M+1, dtype=np.int64)
+    expected_utilities = np.zeros(M+1)
+    iteration = 0
+    while True:
+        iteration += 1
+        residual = 0.0
+        for state in range(M+1):
+            values = discount_factor * expected_utilities[:state+1] - left_fish_counts[:state+1]
+            best_left_fish_count = state - int(np.argmax(values[::-1])) #The last best r is the first best catch
+            utility = (state - best_left_fish_count) + discount_factor * expected_utilities[best_left_fish_count]
+            change = utility - utilities[state]
+            if change != 0:
+                utilities[state] = utility
+                for i in range(predecessor_starts[state], predecessor_starts[state+1]):
+                    expected_utilities[predecessor_left_counts[i]] += predecessor_probabilities[i] * change
+            policies[state] = state - best_left_fish_count
+            residual = max(residual, abs(change))
+        if residual < tolerance:
+            return utilities, policies, iteration
+
+########## Command line ##########
+
+SOLVERS = {
+    "value-iteration": value_iteration,
+    "modified-policy": modified_policy_iteration,
+}
+
+LOG_FIELDS = ['event', 'phase', 'seconds', 'iteration', 'residual', 'state', 'utility', 'policy', 'iterations'] #The CSV columns of the --log file
+
+def main():
+    parser = argparse.ArgumentParser(description="Finds the optimal number of fish to catch for every fish stock of the fisherman village.")
+    parser.add_argument("-M", type=int, default=M, help="maximum number of the fish in the lake")
+    parser.add_argument("--discount-factor", type=float, default=discount_factor)
+    parser.add_argument("--growth-rates", type=float, nargs="+", default=growth_rates)
+    parser.add_argument("--probabilities", type=float, nargs="+", default=probabilities, help="probability of every growth rate")
+    parser.add_argument("--solver", choices=list(SOLVERS), default="value-iteration", help="only value iteration prints the utilities and the policies after every iteration")
+    parser.add_argument("--tolerance", type=float, default=10**-6, help="the solver stops when the Bellman residual is below this")
+    parser.add_argument("--quiet", action="store_true", help="print only the optimal policies, not every iteration")
+    parser.add_argument("--log", help="write the residual of every iteration, the final utilities and policies and the duration of every phase to this file as JSON lines, or as CSV if it ends with .csv")
+    parser.add_argument("--log-every", type=int, default=0, help="write the --log buffer after this many records instead of once at the end")
+    parser.add_argument("--timings", action="store_true", help="print the duration of every phase (solve, write) to stderr at the end")
+    args = parser.parse_args()
+    if len(args.growth_rates) != len(args.probabilities):
+        parser.error("--growth-rates and --probabilities must have the same length")
+
+    with contextlib.ExitStack() as stack:
+        log = stack.enter_context(record_sink(args.log, LOG_FIELDS, args.log_every)) if args.log else None
+        timer = phase_timer([lambda phase, seconds: log.write(event='phase', phase=phase, seconds=seconds)] if log is not None else [])
+        problem = (args.M, args.discount_factor, args.growth_rates, args.probabilities)
+
+        if args.solver == "value-iteration":
+            iteration = 0
+            previous_utilities = np.zeros(args.M+1)
+            for iteration, (utilities, policies) in enumerate(timer.split(iter_value_iteration(*problem, args.tolerance), 'solve', 'write'), start=1):
+                if log is not None:
+                    log.write(event='iteration', iteration=iteration, residual=bellman_residual(utilities, previous_utilities))
+                    previous_utilities = utilities
+                if not args.quiet:
+                    utilities, policies = utilities.tolist(), policies.tolist()
+                    print(f"ITERATION {iteration}")
+                    for i in range(args.M+1):
+                        print(f"\tSTATE {i}:")
+                        print(f"\t\tUtility of state {i} after iteration {iteration}: {utilities[i]}")
+                        print(f"\t\tOptimal policy of state {i} after iteration {iteration}: Catch {policies[i]} fish")
+        else:
+            with timer.phase('solve'):
+                utilities, policies, iteration = SOLVERS[args.solver](*problem, args.tolerance)
+
+        with timer.phase('write'):
+            utilities, policies = list(utilities), list(policies)
+            print("OPTIMAL POLICIES FOR EACH STATE:")
+            for i in range(args.M+1):
+                print(f"\t State {i}: Catch {policies[i]} fish")
+            if log is not None:
+                for i in range(args.M+1):
+                    log.write(event='state', state=i, utility=float(utilities[i]), policy=int(policies[i]))
+                log.write(event='summary', iterations=iteration)
+
+        if args.timings:
+            for phase, seconds in timer.durations.items():
+                print(f"{phase}: {seconds:.3f} s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Benchmark and profiling suite of the three projects.
+
+Usage: python benchmark_suite.py [--workloads csp-enumerate ...] [--repeat 3] [--scale 1.0] [--output results.json]
+                                 [--baseline baseline.json] [--max-regression 0.2] [--profile cprofile|tracemalloc]
+
+Runs every workload on synthetic inputs:
+- course scheduling problems of the generate_problem generator, written in the csv format of problem1 and read back with read_problem,
+- paired actual/OCR word corpora of the generate_corpus generator, with the given alphabet size and noise,
+- fisherman MDPs of the generate_mdp generator, with the given number of random growth rates.
+
+For every workload it records the throughput, the latency percentiles of the single operations (a solution, a word, an iteration
+or a whole run) and the peak traced memory, writes them to a JSON results file and, with --baseline, compares them with a stored
+results file and exits with 1 if a workload regressed more than --max-regression. With --profile, every workload is also run under
+cProfile (hottest functions by own time) or tracemalloc (lines that hold the most memory when the run ends, for example caches and
+results that outlive it) and the hotspots are printed and stored.
+"""
+import argparse
+import cProfile
+import importlib.util
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PROJECTS = {
+    "csp": "Constraint_Satisfaction_Problem_For_Course_Scheduling",
+    "hmm": "Hidden_Markov_Model_for_Optical_Character_Recognition_(OCR)",
+    "mdp": "Markov_Decision_Process_For_Fisherman_Village",
+}
+
+def load_module(project:str, file_name:str):
+    """This function will import a module of a project directory. Every project has its own benchmark.py, so the modules are imported
+    by path under the name project_file_name, and the project directory is added to sys.path for their own imports."""
+    directory = os.path.join(ROOT, PROJECTS[project])
+    if(directory not in sys.path):
+        sys.path.insert(0, directory)
+    name = f"{project}_{file_name}"
+    if(name not in sys.modules):
+        spec = importlib.util.spec_from_file_location(name, os.path.join(directory, file_name + ".py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+class workload:
+    """A benchmarked operation.
+
+    Keyword arguments:
+
+    name: The name in the results file.
+
+    unit: What the throughput counts, for example "solutions".
+
+    setup: Called once with the parsed arguments and a temporary directory for the generated files, returns the input of run and the parameters
+    that are stored with the results.
+
+    run: Called with the input, runs the workload once and returns the number of the units and the latency of every operation in seconds.
+    """
+    def __init__(self, name:str, unit:str, setup, run) -> None:
+        self.name = name
+        self.unit = unit
+        self.setup = setup
+        self.run = run
+
+def timed_items(items) -> tuple[int, list[float]]:
+    """This function will consume the items and return their count and the seconds spent in producing every item."""
+    latencies = []
+    iterator = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            next(iterator)
+        except StopIteration:
+            return len(latencies), latencies
+        latencies.append(time.perf_counter() - start)
+
+def timed_call(function, units:int) -> tuple[int, list[float]]:
+    """This function will call the function once and return units and its seconds as the only latency."""
+    start = time.perf_counter()
+    function()
+    return units, [time.perf_counter() - start]
+
+#Course scheduling
+
+def setup_csp_problem(directory:str, courses:int, classrooms:int, instructors:int, coordinations:int, seed:int):
+    """This function will generate a problem, write it in the csv format of problem1 and read it back, so the format is part of the benchmark."""
+    csp_benchmark = load_module("csp", "benchmark")
+    csp = load_module("csp", "ceng461_hw1_280201033")
+    problem_path = tempfile.mkdtemp(dir=directory)
+    csp_benchmark.write_problem(csp_benchmark.generate_problem(courses, classrooms, instructors, coordinations, seed), problem_path)
+    problem = csp.read_problem(problem_path)
+    parameters = {"courses": courses, "classrooms": classrooms, "instructors": instructors, "coordinations": coordinations, "seed": seed}
+    return problem, parameters
+
+def setup_csp_enumerate(args, directory:str):
+    problem, parameters = setup_csp_problem(directory, 7, 2, 3, 2, args.seed + 3)
+    limit = int(20000 * args.scale)
+    return (problem, limit), dict(parameters, limit=limit)
+
+def run_csp_enumerate(context):
+    problem, limit = context
+    csp = load_module("csp", "ceng461_hw1_280201033")
+    return timed_items(csp.CourseSchedulingCSP(*problem, list(csp.TIME_SLOTS)).iter_solutions("fixed", limit))
+
+def setup_csp_optimize(args, directory:str):
+    return setup_csp_problem(directory, 6, 2, 3, 1, args.seed + 1)
+
+def run_csp_optimize(problem):
+    csp = load_module("csp", "ceng461_hw1_280201033")
+    return timed_call(lambda: csp.CourseSchedulingCSP(*problem, list(csp.TIME_SLOTS)).optimize(csp.objective_weights()), 1)
+
+#OCR
+
+def setup_hmm_model(args, directory:str):
+    """This function will generate a corpus, train a model on its first half and return the model and the OCR outputs of the second half."""
+    hmm = load_module("hmm", "ceng461_hw2_280201033")
+    hmm_modes = load_module("hmm", "benchmark_modes")
+    word_count = int(8000 * args.scale)
+    actual_words, ocr_outputs = hmm_modes.generate_corpus(word_count, args.alphabet_size, args.noise, seed=args.seed)
+    model = hmm.build_log_model(*hmm.calculate_probabilities(actual_words[:word_count // 2], ocr_outputs[:word_count // 2]))
+    return (model, ocr_outputs[word_count // 2:]), {"words": word_count, "alphabet_size": args.alphabet_size, "noise": args.noise, "seed": args.seed}
+
+def run_hmm_decode(context):
+    model, ocr_outputs = context
+    hmm = load_module("hmm", "ceng461_hw2_280201033")
+    return timed_items(hmm.viterbi_decode(ocr_output, model) for ocr_output in ocr_outputs)
+
+def run_hmm_batch(context):
+    model, ocr_outputs = context
+    hmm = load_module("hmm", "ceng461_hw2_280201033")
+    return timed_call(lambda: hmm.viterbi_decode_batch(ocr_outputs, model), len(ocr_outputs))
+
+def setup_hmm_train(args, directory:str):
+    """This function will write a generated corpus as the two UTF-8 files of the streaming trainer and return their paths."""
+    hmm_modes = load_module("hmm", "benchmark_modes")
+    word_count = int(100000 * args.scale)
+    actual_words, ocr_outputs = hmm_modes.generate_corpus(word_count, args.alphabet_size, args.noise, seed=args.seed)
+    paths = [os.path.join(directory, "actual_words.txt"), os.path.join(directory, "ocr_outputs.txt")]
+    for path, words in zip(paths, (actual_words, ocr_outputs)):
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("".join(word + "\n" for word in words))
+    return (paths, word_count), {"words": word_count, "alphabet_size": args.alphabet_size, "noise": args.noise, "seed": args.seed}
+
+def run_hmm_train(context):
+    (actual_words_path, ocr_outputs_path), word_count = context
+    hmm = load_module("hmm", "ceng461_hw2_280201033")
+    return timed_call(lambda: hmm.train_model(actual_words_path, ocr_outputs_path, workers=1), word_count)
+
+#Fisherman MDP
+
+def setup_mdp(args, directory:str):
+    mdp_benchmark = load_module("mdp", "benchmark")
+    problem = mdp_benchmark.generate_mdp(int(10000 * args.scale), args.growth_rates, seed=args.seed)
+    M, discount_factor, growth_rates, probabilities = problem
+    return problem, {"M": M, "discount_factor": discount_factor, "growth_rates": growth_rates, "probabilities": probabilities}
+
+def run_mdp_value_iteration(problem):
+    mdp = load_module("mdp", "ceng461_hw3_280201033")
+    iterations, latencies = timed_items(mdp.iter_value_iteration(*problem))
+    return iterations * (problem[0] + 1), latencies #Throughput in state backups, a latency is one iteration
+
+def run_mdp_modified_policy(problem):
+    mdp = load_module("mdp", "ceng461_hw3_280201033")
+    return timed_call(lambda: mdp.modified_policy_iteration(*problem), 1)
+
+WORKLOADS = [
+    workload("csp-enumerate", "solutions", setup_csp_enumerate, run_csp_enumerate),
+    workload("csp-optimize", "runs", setup_csp_optimize, run_csp_optimize),
+    workload("hmm-decode", "words", setup_hmm_model, run_hmm_decode),
+    workload("hmm-batch", "words", setup_hmm_model, run_hmm_batch),
+    workload("hmm-train", "words", setup_hmm_train, run_hmm_train),
+    workload("mdp-value-iteration", "state backups", setup_mdp, run_mdp_value_iteration),
+    workload("mdp-modified-policy", "runs", setup_mdp, run_mdp_modified_policy),
+]
+
+def peak_memory(run, context) -> int:
+    """This function will run the workload once more under tracemalloc and return the peak of the traced memory in bytes."""
+    tracemalloc.start()
+    try:
+        run(context)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def profile(run, context, mode:str, top:int) -> list[dict]:
+    """This function will run the workload once more under cProfile or tracemalloc and return its top hotspots."""
+    if(mode == "cprofile"):
+        profiler = cProfile.Profile()
+        profiler.runcall(run, context)
+        statistics = pstats.Stats(profiler, stream=io.StringIO()).sort_stats("tottime")
+        hotspots = []
+        for function in statistics.fcn_list[:top]:
+            calls, _, own_time, cumulative_time, _ = statistics.stats[function]
+            hotspots.append({"function": f"{os.path.basename(function[0])}:{function[1]}({function[2]})", "calls": calls, "tottime": own_time, "cumtime": cumulative_time})
+        return hotspots
+    tracemalloc.start()
+    try:
+        run(context)
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    return [{"line": f"{os.path.basename(statistic.traceback[0].filename)}:{statistic.traceback[0].lineno}", "bytes": statistic.size, "blocks": statistic.count}
+            for statistic in snapshot.statistics("lineno")[:top]]
+
+def measure(current:workload, args, directory:str) -> dict:
+    """This function will set up the workload, run it args.repeat times and return its results."""
+    context, parameters = current.setup(args, directory)
+    current.run(context) #Warm up, the first run pays the imports and the caches
+    units = 0
+    elapsed = 0.0
+    latencies = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        run_units, run_latencies = current.run(context)
+        elapsed += time.perf_counter() - start
+        units += run_units
+        latencies.extend(run_latencies)
+    latency_milliseconds = np.percentile(np.array(latencies) * 1000, [50, 90, 99])
+    result = {
+        "parameters": parameters,
+        "unit": current.unit,
+        "throughput": units / elapsed,
+        "latency_ms": {"p50": latency_milliseconds[0], "p90": latency_milliseconds[1], "p99": latency_milliseconds[2]},
+        "operations": len(latencies),
+        "peak_memory_bytes": peak_memory(current.run, context),
+    }
+    if(args.profile):
+        result["hotspots"] = profile(current.run, context, args.profile, args.profile_top)
+    return result
+
+def compare(results:dict, baseline:dict, max_regression:float) -> list[str]:
+    """This function will print the ratios of the results to the baseline and return the names of the workloads whose throughput dropped
+    or whose median latency grew more than max_regression. The workloads that are not in both files are skipped."""
+    print(f"{'workload':<22}{'throughput':>12}{'p50 latency':>13}{'peak memory':>13}")
+    regressions = []
+    for name, result in results["workloads"].items():
+        if(name not in baseline["workloads"]):
+            continue
+        base = baseline["workloads"][name]
+        throughput_ratio = result["throughput"] / base["throughput"]
+        latency_ratio = result["latency_ms"]["p50"] / base["latency_ms"]["p50"]
+        memory_ratio = result["peak_memory_bytes"] / max(1, base["peak_memory_bytes"])
+        regressed = throughput_ratio < 1 - max_regression or latency_ratio > 1 + max_regression
+        if(regressed):
+            regressions.append(name)
+        print(f"{name:<22}{throughput_ratio:>11.2f}x{latency_ratio:>12.2f}x{memory_ratio:>12.2f}x{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the three projects on synthetic workloads.")
+    parser.add_argument("--workloads", nargs="+", choices=[current.name for current in WORKLOADS], default=[current.name for current in WORKLOADS])
+    parser.add_argument("--repeat", type=int, default=3, help="number of the measured runs of every workload")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the size of every generated input")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--alphabet-size", type=int, default=60, help="letters of the generated OCR corpora of the decoding and training workloads")
+    parser.add_argument("--noise", type=float, default=0.2, help="probability that the generated OCR misreads a letter")
+    parser.add_argument("--growth-rates", type=int, default=4, help="number of the random growth rates of the generated MDPs")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file that the results are written to")
+    parser.add_argument("--baseline", help="JSON results file of an earlier run to compare with")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed relative throughput drop or median latency growth against the baseline")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"], help="also report the hottest functions or the lines that hold the most memory at the end of every workload")
+    parser.add_argument("--profile-top", type=int, default=10)
+    args = parser.parse_args()
+
+    results = {
+        "environment": {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(), "cpus": os.cpu_count()},
+        "settings": {"repeat": args.repeat, "scale": args.scale},
+        "workloads": {},
+    }
+    print(f"{'workload':<22}{'throughput':>14} {'unit':<15}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+    for current in WORKLOADS:
+        if(current.name not in args.workloads):
+            continue
+        with tempfile.TemporaryDirectory() as directory:
+            result = measure(current, args, directory)
+        results["workloads"][current.name] = result
+        latency = result["latency_ms"]
+        print(f"{current.name:<22}{result['throughput']:>14.1f} {current.unit + '/s':<15}{latency['p50']:>10.3f}{latency['p90']:>10.3f}{latency['p99']:>10.3f}{result['peak_memory_bytes']/2**20:>10.2f}")
+        for hotspot in result.get("hotspots", []):
+            if(args.profile == "cprofile"):
+                print(f"    {hotspot['tottime']:>9.3f} s own {hotspot['cumtime']:>9.3f} s total {hotspot['calls']:>9} calls  {hotspot['function']}")
+            else:
+                print(f"    {hotspot['bytes']/1024:>9.1f} KiB {hotspot['blocks']:>9} blocks  {hotspot['line']}")
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results are written to {args.output}")
+
+    if(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        print()
+        regressions = compare(results, baseline, args.max_regression)
+        if(regressions):
+            print(f"Regressed workloads: {' '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Phase timing and structured logging shared by the three projects.
+
+The course scheduling, OCR and fisherman programs import phase_timer and record_sink from here for their --timings, --log and
+--log-every options, so the three programs measure their phases and write their log files the same way.
+"""
+import contextlib
+import csv
+import json
+import time
+from collections.abc import Callable, Iterable, Iterator
+
+class phase_timer:
+    """Measures the durations of the phases of a run, for example load, search and write, and reports every measured duration to its hooks.
+
+    Keyword arguments:
+
+    hooks: Functions that are called with the phase name and the measured seconds, for example to write them to a record_sink.
+    """
+    def __init__(self, hooks:Iterable[Callable[[str, float], None]] = ()) -> None:
+        self.durations = {} #Total seconds of every phase in the order the phases are first measured.
+        self.hooks = list(hooks)
+
+    def add(self, name:str, seconds:float) -> None:
+        """This function will add the seconds to the phase and report them to the hooks."""
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        for hook in self.hooks:
+            hook(name, seconds)
+
+    @contextlib.contextmanager
+    def phase(self, name:str) -> Iterator[None]:
+        """This function will measure the body of a with statement as the phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def split(self, items:Iterable, producer:str, consumer:str) -> Iterator:
+        """This function will yield the items and measure the time spent in producing them as the producer phase and the time the caller spends
+        between them as the consumer phase, for example the search and the write of the streamed solutions."""
+        iterator = iter(items)
+        produced = consumed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    produced += time.perf_counter() - start
+                start = time.perf_counter()
+                yield item
+                consumed += time.perf_counter() - start
+        finally:
+            if(hasattr(iterator, "close")): #Stops a generator like closing it directly would, for example the search of a solver.
+                iterator.close()
+            self.add(producer, produced)
+            self.add(consumer, consumed)
+
+class record_sink:
+    """Buffers structured records and writes them as JSON lines or, if the path ends with .csv, as CSV rows, so the progress of a run can be
+    logged without a console line per event.
+
+    Keyword arguments:
+
+    path: The file that the records are written to.
+
+    fields: The columns of the CSV file, a record can have any subset of them. JSON lines keep the fields of every record.
+
+    flush_every: The buffer is written after this many records. 0 means that everything is written once, when the sink is closed.
+    """
+    def __init__(self, path:str, fields:list[str], flush_every:int = 0) -> None:
+        self.file = open(path, "w", newline="")
+        self.csv_writer = None
+        if(path.endswith(".csv")):
+            self.csv_writer = csv.DictWriter(self.file, fields)
+            self.csv_writer.writeheader()
+        self.flush_every = flush_every
+        self.records = []
+
+    def write(self, **record) -> None:
+        """This function will add a record to the buffer, and write the buffer if it has flush_every records."""
+        self.records.append(record)
+        if(self.flush_every and len(self.records) >= self.flush_every):
+            self.flush()
+
+    def flush(self) -> None:
+        """This function will write the buffered records to the file."""
+        if(self.csv_writer is not None):
+            self.csv_writer.writerows(self.records)
+        else:
+            self.file.write("".join(json.dumps(record) + "\n" for record in self.records))
+        self.records = []
+        self.file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+    def __enter__(self) -> "record_sink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()